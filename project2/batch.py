@@ -0,0 +1,73 @@
+"""
+Batched evaluation of many N-by-N tic-tac-toe boards with NumPy
+
+Boards are rows of a (B, N * N) integer array holding the same player ids as
+the list boards in p2_7194.py, without the leading "board" entry, so column
+pos - 1 holds board[pos]. Every win state is a column of a precomputed
+(N * N, lines) incidence matrix, and a single matrix product per player gives
+the number of stones each player has on every line of every board.
+"""
+
+from functools import lru_cache
+
+import numpy as np
+
+import p2_7194 as game
+
+@lru_cache(maxsize=None)
+def get_incidence_matrix(num_rows):
+    # entry (pos - 1, i) is 1 if position pos is part of win state i
+    states = game.get_win_state_table(num_rows)
+    matrix = np.zeros((num_rows ** 2, len(states)), dtype=np.int64)
+    for i, state in enumerate(states):
+        matrix[[pos - 1 for pos in state], i] = 1
+    matrix.setflags(write=False)
+    return matrix
+
+def to_array(boards):
+    # convert a list of list boards into a (B, N * N) array
+    return np.array([board[1:] for board in boards], dtype=np.int64)
+
+def get_num_rows(boards):
+    return int(round(boards.shape[1] ** 0.5))
+
+def get_line_counts(boards):
+    # (B, lines) arrays of the number of stones each player has on every win state
+    incidence = get_incidence_matrix(get_num_rows(boards))
+    return ((boards == game._p1).astype(np.int64) @ incidence,
+            (boards == game._p2).astype(np.int64) @ incidence)
+
+# end game
+def get_winners(boards):
+    # input: (B, N * N) array of boards
+    # output: return (B,) array of winning player ids, _empty where neither player wins,
+    #         matching get_winner for every board
+    num_rows = get_num_rows(boards)
+    (p1_counts, p2_counts) = get_line_counts(boards)
+    winners = np.full(len(boards), game._empty, dtype=np.int64)
+    winners[(p2_counts == num_rows).any(axis=1)] = game._p2
+    winners[(p1_counts == num_rows).any(axis=1)] = game._p1
+    return winners
+
+# state space
+def get_legal_move_masks(boards):
+    # input: (B, N * N) array of boards
+    # output: return (B, N * N) boolean array, true at column pos - 1 for every position
+    #         returned by get_available_moves
+    return boards == game._empty
+
+def get_heuristic_scores(players, boards):
+    # input: player id or (B,) array of player ids, (B, N * N) array of boards
+    # output: return (B,) array matching get_heuristic_score for every board
+    num_rows = get_num_rows(boards)
+    (p1_counts, p2_counts) = get_line_counts(boards)
+    weights = 4 ** np.arange(num_rows + 1, dtype=np.int64)
+    p1_scores = np.where(p2_counts == 0, weights[p1_counts], 0).sum(axis=1)
+    p2_scores = np.where(p1_counts == 0, weights[p2_counts], 0).sum(axis=1)
+    players = np.broadcast_to(np.asarray(players), (len(boards),))
+    return np.where(players == game._p1, p1_scores - p2_scores, p2_scores - p1_scores)
+
+def evaluate(players, boards):
+    # input: player id or (B,) array of player ids, (B, N * N) array of boards
+    # output: return (winners, legal move masks, heuristic scores) for all boards
+    return (get_winners(boards), get_legal_move_masks(boards), get_heuristic_scores(players, boards))
@@ -0,0 +1,237 @@
+"""
+Benchmark suite for the tic-tac-toe AIs
+
+Every benchmark runs a function over a fixed set of positions, generated from
+random games with a fixed seed, so the same positions are measured in every
+version. For each benchmark the suite records a per-call latency histogram and
+percentiles, the work each call actually did (win states, positions or count
+lookups examined, search nodes or playouts) as read from the counters the AIs
+keep, and memory allocated per call in a separate pass under tracemalloc so that
+tracing does not skew the latencies. Results are written as JSON, and a previous
+results file can be given to print the change in median latency.
+
+usage: python bench.py --output bench.json [--compare old.json]
+"""
+
+import argparse
+import importlib
+import json
+import platform
+import random
+import time
+import tracemalloc
+
+import bitboard
+import mcts
+import p2_7194 as game
+import solver
+
+tic_tac_toe = importlib.import_module("tic-tac-toe")
+
+_default_positions = 200
+_default_seed = 0
+
+# fixed budgets for the searches, so every version does the same amount of work per position
+_solver_nodes = 2000
+_solver_table_bits = 12
+_mcts_playouts = 200
+
+# upper edges of the latency histogram buckets, in microseconds
+_buckets = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000, 20000, 50000, 100000)
+
+# positions
+def make_positions(num_rows, count, seed, backend=game._list_backend):
+    # return count (player to move, board, game) triples from random games that are still in progress
+    rng = random.Random(seed * 1000 + num_rows)
+    positions = []
+    while len(positions) < count:
+        state = game.Game(num_rows, rng.choice((game._p1, game._p2)), backend)
+        if num_rows == 3:
+            # the state space is created before the first move and updated move by move
+            state.get_threat_counter()
+        num_moves = rng.randrange(num_rows ** 2 - 1)
+        for i in range(num_moves):
+            if state.result() is not None:
+                break
+            state.play(rng.choice(state.legal_moves()))
+        if state.result() is None:
+            positions.append((state.player, state.board, state))
+    return positions
+
+# benchmarks
+# each benchmark is (name, board size, backend, function to time, unit of work, function reading
+# the running total of work done so far, function preparing any extra input outside the timed call)
+# the work of a call is the change in the running total across the call
+def count_states_examined(prepared):
+    return game._states_examined
+
+def count_lines_examined(prepared):
+    return bitboard._lines_examined
+
+def count_positions_examined(prepared):
+    return game._positions_examined
+
+def count_lookups(prepared):
+    return prepared.lookups
+
+def count_nodes(prepared):
+    return prepared.nodes
+
+def count_playouts(prepared):
+    return prepared[0]
+
+def prepare_nothing(player, board, state):
+    return None
+
+def prepare_state_space(player, board, state):
+    # in a game the state space is created before the first move and updated move by move,
+    # so it is not part of the timing
+    return state.get_threat_counter()
+
+def prepare_solver(player, board, state):
+    # a fresh solver per position, so the transposition table does not carry over between positions
+    return solver.Solver(game.get_num_rows(board), time_limit=None, node_limit=_solver_nodes,
+                         table_bits=_solver_table_bits)
+
+def prepare_playouts(player, board, state):
+    # holds the number of playouts of the last search
+    return [0]
+
+def run_solver(player, board, prepared):
+    prepared.search(player, board)
+
+def run_mcts(player, board, prepared):
+    prepared[0] = mcts.search(player, board, time_limit=None, playouts=_mcts_playouts, workers=1,
+                              seed=_default_seed)[1]
+
+def get_benchmarks(sizes):
+    benchmarks = []
+    for num_rows in sizes:
+        benchmarks.append(("get_winner", num_rows, game._list_backend,
+                           lambda player, board, prepared : game.get_winner(board),
+                           "win states", count_states_examined, prepare_nothing))
+        benchmarks.append(("get_winner[bitboard]", num_rows, game._bit_backend,
+                           lambda player, board, prepared : game.get_winner(board),
+                           "win lines", count_lines_examined, prepare_nothing))
+        benchmarks.append(("choose_beginner_move", num_rows, game._list_backend,
+                           lambda player, board, prepared : game.choose_beginner_move(player, board),
+                           "positions", count_positions_examined, prepare_nothing))
+        benchmarks.append(("choose_expert_move", num_rows, game._list_backend,
+                           lambda player, board, prepared : game.choose_expert_move(player, board),
+                           "win paths", count_states_examined, prepare_nothing))
+        if num_rows == 3:
+            benchmarks.append(("state_space_strategy", num_rows, game._list_backend,
+                               tic_tac_toe.state_space_strategy,
+                               "lookups", count_lookups, prepare_state_space))
+        else:
+            # 3-by-3 master moves come from the perfect-play table
+            benchmarks.append(("solver.search", num_rows, game._bit_backend, run_solver,
+                               "nodes", count_nodes, prepare_solver))
+        benchmarks.append(("mcts.search", num_rows, game._bit_backend, run_mcts,
+                           "playouts", count_playouts, prepare_playouts))
+    return benchmarks
+
+# measurement
+def get_histogram(latencies):
+    # number of calls falling in each bucket, keyed by the bucket's upper edge in microseconds
+    histogram = {str(edge) : 0 for edge in _buckets}
+    histogram["inf"] = 0
+    for latency in latencies:
+        micros = latency * 1e6
+        for edge in _buckets:
+            if micros <= edge:
+                histogram[str(edge)] += 1
+                break
+        else:
+            histogram["inf"] += 1
+    return histogram
+
+def get_percentile(values, p):
+    # nearest-rank percentile of values, which must be sorted
+    return values[max(0, -(-p * len(values) // 100) - 1)]
+
+def run_benchmark(function, count_work, prepare, positions, seed):
+    # time every call, then repeat the calls under tracemalloc to measure allocations
+    prepared = [prepare(player, board, state) for (player, board, state) in positions]
+
+    random.seed(seed)
+    latencies = []
+    work = 0
+    for (i, (player, board, state)) in enumerate(positions):
+        before = count_work(prepared[i])
+        start = time.perf_counter()
+        function(player, board, prepared[i])
+        latencies.append(time.perf_counter() - start)
+        work += count_work(prepared[i]) - before
+
+    # prepared again, so searches start from the same empty tables as in the timed calls
+    prepared = [prepare(player, board, state) for (player, board, state) in positions]
+    random.seed(seed)
+    allocated = []
+    tracemalloc.start()
+    for (i, (player, board, state)) in enumerate(positions):
+        before = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        function(player, board, prepared[i])
+        allocated.append(tracemalloc.get_traced_memory()[1] - before)
+    tracemalloc.stop()
+
+    latencies.sort()
+    allocated.sort()
+    return {
+        "calls": len(positions),
+        "total_seconds": sum(latencies),
+        "latency_us": {"p" + str(p) : get_percentile(latencies, p) * 1e6 for p in (50, 90, 99, 100)},
+        "histogram_us": get_histogram(latencies),
+        "work_per_call": work / len(positions),
+        "peak_bytes_per_call": {"mean" : sum(allocated) / len(allocated),
+                                "max" : allocated[-1]},
+        }
+
+def run_suite(sizes=(3, 4, 6), count=_default_positions, seed=_default_seed):
+    results = {}
+    for (name, num_rows, backend, function, unit, count_work, prepare) in get_benchmarks(sizes):
+        positions = make_positions(num_rows, count, seed, backend)
+        results[name + "/" + str(num_rows)] = run_benchmark(function, count_work, prepare, positions, seed)
+        results[name + "/" + str(num_rows)]["work_unit"] = unit
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "positions": count,
+        "seed": seed,
+        "benchmarks": results,
+        }
+
+def print_results(results, previous=None):
+    for key in results["benchmarks"]:
+        result = results["benchmarks"][key]
+        line = "{0:32} p50 {1:10.2f} us  p99 {2:10.2f} us  work {3:8.1f} {4:10}  peak {5:10.0f} B".format(
+            key, result["latency_us"]["p50"], result["latency_us"]["p99"],
+            result["work_per_call"], result.get("work_unit", ""), result["peak_bytes_per_call"]["mean"])
+        if previous and key in previous["benchmarks"]:
+            before = previous["benchmarks"][key]["latency_us"]["p50"]
+            line += "  ({0:+.1%} p50)".format(result["latency_us"]["p50"] / before - 1 if before else 0)
+        print(line)
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the tic-tac-toe AIs")
+    parser.add_argument("--output", default="bench.json")
+    parser.add_argument("--compare", help="previous results file to compare against")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[3, 4, 6])
+    parser.add_argument("--positions", type=int, default=_default_positions)
+    parser.add_argument("--seed", type=int, default=_default_seed)
+    args = parser.parse_args()
+
+    results = run_suite(args.sizes, args.positions, args.seed)
+    with open(args.output, "w") as outfile:
+        json.dump(results, outfile, indent=2)
+
+    previous = None
+    if args.compare:
+        with open(args.compare) as infile:
+            previous = json.load(infile)
+    print_results(results, previous)
+    print("Results saved to " + args.output)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""
+Bitboard backend for the N-by-N tic-tac-toe board used in p2_7194.py
+
+Each player's stones are stored as the bits of a single integer, with board
+position pos (1 to num_rows ** 2) mapped to bit (pos - 1). Win lines are
+precomputed as masks once per board size, so checking for a winner, listing
+open positions and making or undoing a move are all done with bit operations.
+"""
+
+from functools import lru_cache
+
+_empty = 0
+
+# running total of the win line masks tested by get_winner, read by the benchmarks
+_lines_examined = 0
+
+# win line masks
+@lru_cache(maxsize=None)
+def get_row_masks(num_rows):
+    row = (1 << num_rows) - 1
+    return tuple(row << (i * num_rows) for i in range(num_rows))
+
+@lru_cache(maxsize=None)
+def get_column_masks(num_rows):
+    column = sum(1 << (i * num_rows) for i in range(num_rows))
+    return tuple(column << i for i in range(num_rows))
+
+@lru_cache(maxsize=None)
+def get_diagonal_masks(num_rows):
+    return (sum(1 << (i * (num_rows + 1)) for i in range(num_rows)),
+            sum(1 << ((i + 1) * (num_rows - 1)) for i in range(num_rows)))
+
+@lru_cache(maxsize=None)
+def get_win_masks(num_rows):
+    # combinations of positions that will result in winning if occupied by any single player
+    return get_row_masks(num_rows) + get_column_masks(num_rows) + get_diagonal_masks(num_rows)
+
+@lru_cache(maxsize=None)
+def get_incidence_masks(num_rows):
+    # entry pos holds the win line masks passing through that position
+    return tuple(tuple(line for line in get_win_masks(num_rows) if pos and line & (1 << (pos - 1)))
+                 for pos in range(num_rows ** 2 + 1))
+
+@lru_cache(maxsize=None)
+def get_full_mask(num_rows):
+    return (1 << (num_rows ** 2)) - 1
+
+def get_positions(mask):
+    # board positions of the bits set in mask, in increasing order
+    positions = []
+    while mask:
+        low = mask & -mask
+        positions.append(low.bit_length())
+        mask ^= low
+    return positions
+
+class BitBoard:
+    # behaves like the list board ["board", 0, ...] for indexing, so the
+    # printing and input functions work on either backend unchanged
+
+    def __init__(self, num_rows):
+        self.num_rows = num_rows
+        # player id -> mask of positions occupied by that player
+        self.stones = {}
+
+    def __len__(self):
+        return self.num_rows ** 2 + 1
+
+    def __getitem__(self, pos):
+        if pos == 0:
+            return "board"
+        if pos < 0 or pos >= len(self):
+            raise IndexError("board position out of range")
+        bit = 1 << (pos - 1)
+        for player, mask in self.stones.items():
+            if mask & bit:
+                return player
+        return _empty
+
+    def __setitem__(self, pos, player):
+        if pos <= 0 or pos >= len(self):
+            raise IndexError("board position out of range")
+        bit = 1 << (pos - 1)
+        for pl in self.stones:
+            self.stones[pl] &= ~bit
+        if player != _empty:
+            self.stones[player] = self.stones.get(player, 0) | bit
+
+    def __iter__(self):
+        return (self[pos] for pos in range(len(self)))
+
+    def get_occupied(self):
+        occupied = 0
+        for mask in self.stones.values():
+            occupied |= mask
+        return occupied
+
+    def copy(self):
+        board = BitBoard(self.num_rows)
+        board.stones = dict(self.stones)
+        return board
+
+    @classmethod
+    def from_list(cls, board):
+        # convert a list board into the equivalent bitboard
+        bit_board = cls(int(len(board) ** 0.5))
+        for pos in range(1, len(board)):
+            if board[pos] != _empty:
+                bit_board.stones[board[pos]] = bit_board.stones.get(board[pos], 0) | (1 << (pos - 1))
+        return bit_board
+
+# state space
+def get_available_moves(board):
+    return get_positions(get_full_mask(board.num_rows) & ~board.get_occupied())
+
+# end game
+def get_winner(board):
+    # return player id if player meets winning condition
+    # return none if neither player wins
+    global _lines_examined
+    lines = get_win_masks(board.num_rows)
+    for player, mask in board.stones.items():
+        for (i, line) in enumerate(lines):
+            if mask & line == line:
+                _lines_examined += i + 1
+                return player
+        _lines_examined += len(lines)
+    return None
+
+def is_winning_move(player, board, pos):
+    # only the win lines through the position just played are checked
+    mask = board.stones.get(player, 0)
+    for line in get_incidence_masks(board.num_rows)[pos]:
+        if mask & line == line:
+            return True
+    return False
+
+# moving
+def make_move(player, board, pos):
+    board.stones[player] = board.stones.get(player, 0) | (1 << (pos - 1))
+
+def undo_move(player, board, pos):
+    board.stones[player] &= ~(1 << (pos - 1))
@@ -0,0 +1,169 @@
+"""
+Monte Carlo tree search (UCT) for the N-by-N tic-tac-toe game in p2_7194.py
+
+Each worker grows its own search tree from the current position on bitboards,
+using random playouts that take an immediate win whenever one is available.
+The root statistics of all workers are merged and the most visited move is
+played, so the search scales across a process pool without any shared state.
+"""
+
+import math
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import bitboard
+
+# default budget for a single move
+_default_time_limit = 1.0
+
+# exploration constant of the UCT formula
+_exploration = math.sqrt(2)
+
+class Node:
+    # wins and visits are counted from the point of view of the player who
+    # made the move leading to this node
+    __slots__ = ("move", "parent", "children", "untried", "visits", "wins", "won", "terminal")
+
+    def __init__(self, move, parent, untried, won=False, terminal=False):
+        self.move = move
+        self.parent = parent
+        self.children = []
+        self.untried = untried
+        self.visits = 0
+        self.wins = 0.0
+        self.won = won
+        self.terminal = terminal
+
+    def select_child(self):
+        log_visits = math.log(self.visits)
+        return max(self.children, key=lambda child :
+                   child.wins / child.visits + _exploration * math.sqrt(log_visits / child.visits))
+
+def is_win(mask, pos, incidence):
+    for line in incidence[pos]:
+        if mask & line == line:
+            return True
+    return False
+
+def rollout(mover, other, empty, incidence, rng, light):
+    # play random moves until the game ends, with mover to move first
+    # return 1 if other wins, 0 if mover wins, 0.5 for a tie
+    moves = bitboard.get_positions(empty)
+    rng.shuffle(moves)
+    own = (mover, other)
+    turn = 0
+    for i in range(len(moves)):
+        if light:
+            # take an immediate win if there is one
+            for pos in moves[i:]:
+                if is_win(own[turn] | (1 << (pos - 1)), pos, incidence):
+                    return 1.0 if turn else 0.0
+        pos = moves[i]
+        mask = own[turn] | (1 << (pos - 1))
+        own = (mask, own[1]) if turn == 0 else (own[0], mask)
+        if not light and is_win(mask, pos, incidence):
+            return 1.0 if turn else 0.0
+        turn = 1 - turn
+    return 0.5
+
+# input: board size, stones of the player to move and of the other player, time limit in seconds,
+#        maximum number of playouts, random seed, whether to use light playouts
+# output: return (dict of root move -> (visits, wins), number of playouts run)
+def run_playouts(num_rows, mover, other, time_limit=_default_time_limit, playouts=None, seed=None, light=True):
+    rng = random.Random(seed)
+    full = bitboard.get_full_mask(num_rows)
+    incidence = bitboard.get_incidence_masks(num_rows)
+    root = Node(None, None, bitboard.get_positions(full & ~(mover | other)))
+    deadline = time.perf_counter() + time_limit if time_limit else None
+
+    count = 0
+    while (playouts is None or count < playouts) and \
+          (deadline is None or time.perf_counter() < deadline):
+        node = root
+        (a, b) = (mover, other)
+
+        # selection, where a is the player to move at node
+        while not node.untried and node.children and not node.terminal:
+            node = node.select_child()
+            (a, b) = (b, a | (1 << (node.move - 1)))
+
+        # expansion
+        if node.untried and not node.terminal:
+            pos = node.untried.pop(rng.randrange(len(node.untried)))
+            new_a = a | (1 << (pos - 1))
+            won = is_win(new_a, pos, incidence)
+            remaining = full & ~(new_a | b)
+            child = Node(pos, node, [] if won else bitboard.get_positions(remaining),
+                         won, won or not remaining)
+            node.children.append(child)
+            node = child
+            (a, b) = (b, new_a)
+
+        # simulation, scored for the player who moved into node
+        if node.terminal:
+            result = 1.0 if node.won else 0.5
+        else:
+            result = rollout(a, b, full & ~(a | b), incidence, rng, light)
+
+        # backpropagation
+        while node is not None:
+            node.visits += 1
+            node.wins += result
+            result = 1.0 - result
+            node = node.parent
+        count += 1
+
+    return ({child.move : (child.visits, child.wins) for child in root.children}, count)
+
+# process pool shared by all searches
+_pool = None
+_pool_workers = None
+
+def get_pool(workers):
+    global _pool, _pool_workers
+    if _pool is None or _pool_workers != workers:
+        if _pool is not None:
+            _pool.shutdown()
+        _pool = ProcessPoolExecutor(max_workers=workers)
+        _pool_workers = workers
+    return _pool
+
+# input: id of player to move, board in either backend, time limit in seconds, maximum number of
+#        playouts across all workers, number of worker processes, base random seed
+# output: return (position, number of playouts, elapsed seconds) for the most visited move
+def search(player, board, time_limit=_default_time_limit, playouts=None, workers=None, seed=None,
+           light=True):
+    if not isinstance(board, bitboard.BitBoard):
+        board = bitboard.BitBoard.from_list(board)
+    mover = board.stones.get(player, 0)
+    other = board.get_occupied() & ~mover
+    workers = workers or os.cpu_count()
+    seed = random.getrandbits(32) if seed is None else seed
+
+    start = time.perf_counter()
+    if workers == 1:
+        results = [run_playouts(board.num_rows, mover, other, time_limit, playouts, seed, light)]
+    else:
+        # root parallelization, each worker grows an independent tree
+        shares = [None] * workers if playouts is None else \
+                 [playouts // workers + (1 if i < playouts % workers else 0) for i in range(workers)]
+        pool = get_pool(workers)
+        futures = [pool.submit(run_playouts, board.num_rows, mover, other, time_limit, shares[i],
+                               seed + i, light)
+                   for i in range(workers)]
+        results = [future.result() for future in futures]
+    elapsed = time.perf_counter() - start
+
+    visits = {}
+    total = 0
+    for (stats, count) in results:
+        total += count
+        for move in stats:
+            (move_visits, move_wins) = visits.get(move, (0, 0.0))
+            visits[move] = (move_visits + stats[move][0], move_wins + stats[move][1])
+
+    best = max(visits, key=lambda move : (visits[move][0], visits[move][1])) if visits else \
+           bitboard.get_available_moves(board)[0]
+    return (best, total, elapsed)
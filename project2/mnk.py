@@ -0,0 +1,230 @@
+"""
+Generalized m,n,k game for the tic-tac-toe AI
+
+A player wins by occupying k positions in a row, column or diagonal of a board
+with num_rows rows and num_columns columns, so 3,3,3 is tic-tac-toe and
+15,15,5 is gomoku. Boards use the same ["board", 0, ...] layout as
+p2_7194.py, with positions numbered from 1 in row-major order.
+
+Win states are all windows of length k, and the game keeps them in a
+ThreatCounter that is updated only along the lines through each move. Moves
+are only considered near existing stones, so the AI stays fast on boards with
+hundreds of positions.
+"""
+
+from functools import lru_cache
+
+import p2_7194 as game
+import threats
+
+# candidate moves are open positions within this many rows and columns of a stone
+_default_radius = 2
+
+# search settings for choose_mnk_move
+_default_depth = 2
+_default_width = 8
+
+_win_score = 1 << 62
+
+# win states
+@lru_cache(maxsize=None)
+def get_win_state_table(num_rows, num_columns, k):
+    # every window of k positions along a row, column or diagonal
+    def get_pos(r, c):
+        return r * num_columns + c + 1
+
+    states = []
+    for (dr, dc) in ((0, 1), (1, 0), (1, 1), (1, -1)):
+        for r in range(num_rows):
+            for c in range(num_columns):
+                end_r = r + dr * (k - 1)
+                end_c = c + dc * (k - 1)
+                if 0 <= end_r < num_rows and 0 <= end_c < num_columns:
+                    states.append(tuple([get_pos(r + dr * i, c + dc * i) for i in range(k)]))
+    return tuple(states)
+
+def get_win_states(num_rows, num_columns, k):
+    # combinations of positions that will result in winning if occupied by any single player
+    return list(get_win_state_table(num_rows, num_columns, k))
+
+def get_win_paths(player, board, num_rows, num_columns, k):
+    # combinations of open postions that the current player would need to occupy to reach a win state
+    # given the current state of the game
+    opponent = game.get_opponent(player)
+    paths = [state for state in get_win_state_table(num_rows, num_columns, k)
+             if opponent not in [board[pos] for pos in state]]
+    return [tuple([pos for pos in path if board[pos] == game._empty]) for path in paths]
+
+@lru_cache(maxsize=None)
+def get_neighborhoods(num_rows, num_columns, radius):
+    # entry pos holds the positions within radius rows and columns of pos, excluding pos
+    neighborhoods = [()]
+    for r in range(num_rows):
+        for c in range(num_columns):
+            neighborhoods.append(tuple([nr * num_columns + nc + 1
+                                        for nr in range(max(0, r - radius), min(num_rows, r + radius + 1))
+                                        for nc in range(max(0, c - radius), min(num_columns, c + radius + 1))
+                                        if (nr, nc) != (r, c)]))
+    return tuple(neighborhoods)
+
+# game engine
+class MNKGame:
+    # same interface as p2_7194.Game, plus candidate_moves() for search
+
+    def __init__(self, num_rows=15, num_columns=15, k=5, starting_player=game._p1,
+                 radius=_default_radius):
+        self.num_rows = num_rows
+        self.num_columns = num_columns
+        self.k = k
+        self.board = ["board"] + [game._empty] * (num_rows * num_columns)
+        self.player = starting_player
+        self.open_moves = set(range(1, len(self.board)))
+        self.history = []
+        self.winner = None
+
+        self.threats = threats.ThreatCounter(get_win_state_table(num_rows, num_columns, k),
+                                             (game._p1, game._p2))
+        self.neighborhoods = get_neighborhoods(num_rows, num_columns, radius)
+        # number of stones within the radius of each position, and the open positions with any,
+        # both updated with the neighborhood of every move like the threat counts
+        self.nearby = [0] * len(self.board)
+        self.candidates = set()
+
+    def legal_moves(self):
+        return sorted(self.open_moves) if self.result() is None else []
+
+    def candidate_moves(self):
+        # open positions near existing stones, or the center of an empty board
+        if not self.history:
+            return [(self.num_rows // 2) * self.num_columns + self.num_columns // 2 + 1]
+        # in board order, so ties in move ordering are broken the same way every time
+        return sorted(self.candidates)
+
+    def play(self, pos):
+        if self.result() is not None:
+            raise ValueError("game is already over")
+        if pos not in self.open_moves:
+            raise ValueError("position " + str(pos) + " is not available")
+
+        self.board[pos] = self.player
+        self.open_moves.discard(pos)
+        self.threats.play(self.player, pos)
+        self.candidates.discard(pos)
+        for q in self.neighborhoods[pos]:
+            self.nearby[q] += 1
+            if self.board[q] == game._empty:
+                self.candidates.add(q)
+        if self.threats.has_won(self.player, pos):
+            self.winner = self.player
+        self.history.append((self.player, pos))
+        self.player = game.get_opponent(self.player)
+
+    def undo(self):
+        if not self.history:
+            raise ValueError("no moves to undo")
+
+        (player, pos) = self.history.pop()
+        self.board[pos] = game._empty
+        self.open_moves.add(pos)
+        self.threats.undo(player, pos)
+        for q in self.neighborhoods[pos]:
+            self.nearby[q] -= 1
+            if self.nearby[q] == 0:
+                self.candidates.discard(q)
+        if self.nearby[pos] > 0:
+            self.candidates.add(pos)
+        self.winner = None
+        self.player = player
+        return pos
+
+    def result(self):
+        if self.winner is not None:
+            return self.winner
+        return game._tie if not self.open_moves else None
+
+# AI
+def get_weights(k):
+    # weight of a live line by the number of positions it still needs,
+    # so that a line one position short outweighs any number of longer ones
+    return [0] + [1 << (4 * (k - needed)) for needed in range(1, k + 1)]
+
+def score_move(game_state, player, pos, weights):
+    # value of pos from the live lines through it on both sides, own lines counting double
+    opponent = game.get_opponent(player)
+    score = 0
+    for needed in range(1, len(weights)):
+        score += weights[needed] * (2 * game_state.threats.get_count(player, pos, needed) +
+                                    game_state.threats.get_count(opponent, pos, needed))
+    return score
+
+def evaluate(game_state, player, weights):
+    # static score of the position for player from the live lines on either side
+    opponent = game.get_opponent(player)
+    live = game_state.threats.live
+    return sum([weights[needed] * (live[player][needed] - live[opponent][needed])
+                for needed in range(1, len(weights))])
+
+def get_ordered_moves(game_state, player, weights, width):
+    moves = game_state.candidate_moves()
+    moves.sort(key=lambda pos : -score_move(game_state, player, pos, weights))
+    return moves[:width]
+
+def negamax(game_state, depth, alpha, beta, weights, width):
+    player = game_state.player
+    result = game_state.result()
+    if result is not None:
+        # the player who just moved won, or the board is full
+        return -_win_score if result != game._tie else 0
+    if depth == 0:
+        return evaluate(game_state, player, weights)
+
+    best = -_win_score - 1
+    for pos in get_ordered_moves(game_state, player, weights, width):
+        game_state.play(pos)
+        score = -negamax(game_state, depth - 1, -beta, -alpha, weights, width)
+        game_state.undo()
+        best = max(best, score)
+        alpha = max(alpha, score)
+        if alpha >= beta:
+            break
+    return best
+
+def choose_mnk_move(player, game_state, depth=_default_depth, width=_default_width):
+    # input: id of player to move, MNKGame
+    # output: return (position, method) chosen by a shallow search over the best-scoring candidate moves
+    threat_counts = game_state.threats
+    opponent = game.get_opponent(player)
+    candidates = game_state.candidate_moves()
+
+    # complete an own line or block the opponent's without searching
+    for needed_player in (player, opponent):
+        for pos in candidates:
+            if threat_counts.get_count(needed_player, pos, 1) > 0:
+                return (pos, "threat analysis")
+
+    weights = get_weights(game_state.k)
+    best = None
+    for pos in get_ordered_moves(game_state, player, weights, width):
+        game_state.play(pos)
+        score = -negamax(game_state, depth - 1, -_win_score - 1, _win_score + 1, weights, width)
+        game_state.undo()
+        if best is None or score > best[0]:
+            best = (score, pos)
+    return (best[1], "threat search (depth " + str(depth) + ")")
+
+def print_board(board, num_columns):
+    divider = "-" * (num_columns * 4 + 1)
+    print(divider)
+    for r in range(1, len(board), num_columns):
+        print("|" + "".join([" " + game.get_marker(board[pos]) + " |" for pos in range(r, r + num_columns)]))
+        print(divider)
+
+if __name__ == "__main__":
+    # computer plays itself on a gomoku board
+    game_state = MNKGame(15, 15, 5)
+    while game_state.result() is None:
+        (pos, strat) = choose_mnk_move(game_state.player, game_state)
+        game_state.play(pos)
+    print_board(game_state.board, game_state.num_columns)
+    print(game.get_marker(game_state.result()) + " Wins" if game_state.result() != game._tie else
+          "Tie Game!")
@@ -3,6 +3,13 @@ Program written by Thomas Li <thl13@zips.uakron.edu> on 20 Sep 2019
 """
 
 import random
+from functools import lru_cache
+
+import bitboard
+import mcts
+import perfect_play
+import solver
+import threats
 
 # player ids
 _empty = 0
@@ -13,6 +20,19 @@ _p2 = 10
 _pvp = 0
 _beginner = 1
 _expert = 2
+_master = 3
+_mcts = 4
+
+# game result ids, for games that end with no winner
+_tie = -1
+
+# board backend ids
+_list_backend = 0
+_bit_backend = 1
+
+# running totals of the win states and board positions examined, read by the benchmarks
+_states_examined = 0
+_positions_examined = 0
 
 # helper functions
 def get_opponent(player):
@@ -22,24 +42,55 @@ def get_marker(player):
     return "X" if player == _p2 else "O" if player == _p1 else " "
 
 # board functions
-def make_board(num_rows):
+def make_board(num_rows, backend=_list_backend):
+    if backend is _bit_backend:
+        return bitboard.BitBoard(num_rows)
     return ["board"] + [0 for i in range(num_rows ** 2)]
 
+def is_bit_board(board):
+    return isinstance(board, bitboard.BitBoard)
+
 def get_num_rows(board):
     return int(len(board) ** 0.5)
 
 def get_rows(board):
-    num_rows = get_num_rows(board)
-    return [tuple([j for j in range(i, i + num_rows, 1)]) for i in range(1, len(board), num_rows)]
+    return list(get_row_table(get_num_rows(board)))
 
 def get_columns(board):
-    num_rows = get_num_rows(board)
-    return [tuple([j for j in range(i, len(board), num_rows)]) for i in range(1, num_rows + 1, 1)]
+    return list(get_column_table(get_num_rows(board)))
 
 def get_diagonals(board):
-    num_rows = get_num_rows(board)
-    return [tuple([j for j in range(1, len(board), num_rows + 1)]),
-            tuple([k for k in range(num_rows, len(board) - 1, num_rows - 1)])]
+    return list(get_diagonal_table(get_num_rows(board)))
+
+# win line tables, computed once per board size
+@lru_cache(maxsize=None)
+def get_row_table(num_rows):
+    size = num_rows ** 2 + 1
+    return tuple(tuple(range(i, i + num_rows)) for i in range(1, size, num_rows))
+
+@lru_cache(maxsize=None)
+def get_column_table(num_rows):
+    size = num_rows ** 2 + 1
+    return tuple(tuple(range(i, size, num_rows)) for i in range(1, num_rows + 1))
+
+@lru_cache(maxsize=None)
+def get_diagonal_table(num_rows):
+    size = num_rows ** 2 + 1
+    return (tuple(range(1, size, num_rows + 1)),
+            tuple(range(num_rows, size - 1, num_rows - 1)))
+
+@lru_cache(maxsize=None)
+def get_win_state_table(num_rows):
+    return get_row_table(num_rows) + get_column_table(num_rows) + get_diagonal_table(num_rows)
+
+@lru_cache(maxsize=None)
+def get_incidence_table(num_rows):
+    # entry pos holds the win states passing through that position
+    return tuple(tuple(state for state in get_win_state_table(num_rows) if pos in state)
+                 for pos in range(num_rows ** 2 + 1))
+
+def get_lines_through(board, pos):
+    return get_incidence_table(get_num_rows(board))[pos]
 
 def print_row(board, row):
     output = "|"
@@ -55,47 +106,64 @@ def print_board(board):
 
 # state space
 def get_available_moves(board):
+    global _positions_examined
+    if is_bit_board(board):
+        return bitboard.get_available_moves(board)
+    _positions_examined += len(board)
     return [i for i in range(len(board)) if board[i] == _empty]
 
 def get_win_states(board):
     # combinations of positions that will result in winning if occupied by any single player
-    return get_rows(board) + get_columns(board) + get_diagonals(board)
+    return list(get_win_state_table(get_num_rows(board)))
 
 def get_win_paths(player, board):
     # combinations of open postions that the current player would need to occupy to reach a win state
     # given the current state of the game
+    global _states_examined
     paths = get_win_states(board)
+    _states_examined += len(paths)
     paths = [path for path in paths if get_opponent(player) not in [board[pos] for pos in path]]
     paths = [tuple([pos for pos in path if board[pos] is _empty]) for path in paths]
     return paths
 
+def get_heuristic_score(player, board):
+    # each open win path counts for its player, weighted by 4 for every position already held,
+    # and the opponent's paths count against the player
+    num_rows = get_num_rows(board)
+    return sum([4 ** (num_rows - len(path)) for path in get_win_paths(player, board)]) - \
+           sum([4 ** (num_rows - len(path)) for path in get_win_paths(get_opponent(player), board)])
+
 # end game
 def get_winner(board):
     # return player id if player meets winning condition
     # return none if neither player wins
+    global _states_examined
+    if is_bit_board(board):
+        return bitboard.get_winner(board)
     num_rows = get_num_rows(board)
     win_states = get_win_states(board)
+    _states_examined += len(win_states)
     state_scores = [sum([board[pos] for pos in state]) for state in win_states]
     return _p1 if num_rows * _p1 in state_scores else _p2 if num_rows * _p2 in state_scores else None
 
 # moving
 def choose_player_move(player, board):
-    pos = input("\nChoose a position to occupy: ")
-    
-    try:
-        pos = int(pos)
-    except ValueError:
-        print("Invalid position. Please try again.")
-    
-    if pos in get_available_moves(board):
-        return (pos, "player move")
-                    
-    if pos in range(1, len(board)):
-        print("Position occupied. Please try again.")
-    else:
-        print("Invalid position. Please try again.")
-        
-    return choose_player_move(player, board)
+    while True:
+        pos = input("\nChoose a position to occupy: ")
+
+        try:
+            pos = int(pos)
+        except ValueError:
+            print("Invalid position. Please try again.")
+            continue
+
+        if pos in get_available_moves(board):
+            return (pos, "player move")
+
+        if pos in range(1, len(board)):
+            print("Position occupied. Please try again.")
+        else:
+            print("Invalid position. Please try again.")
 
 def choose_beginner_move(player, board):
     # pick move randomly
@@ -106,99 +174,245 @@ def choose_expert_move(player, board):
     # all open positions start with score zero
     # each win path on either side that includes the position increases its score
     # shorter win paths are checked first, longer paths are only checked if there is a tie
+    global _states_examined
     win_paths = get_win_paths(player, board) + get_win_paths(get_opponent(player), board)
-    pos = p for p in path for path in win_paths in len(path) == 1
-    if not pos:
-        pos = random.choice(get_available_moves(board))
-    return (pos, "heuristic-based move")
+
+    # finishing a win path is taken right away, own paths before the opponent's
+    for (i, path) in enumerate(win_paths):
+        if len(path) == 1:
+            _states_examined += i + 1
+            return (path[0], "heuristic-based move")
+    _states_examined += len(win_paths)
+
+    candidates = get_available_moves(board)
+    for length in range(2, get_num_rows(board) + 1):
+        _states_examined += len(candidates) * len(win_paths)
+        scores = {pos : len([path for path in win_paths if len(path) == length and pos in path])
+                  for pos in candidates}
+        top_score = max(scores.values())
+        if top_score > 0:
+            candidates = [pos for pos in candidates if scores[pos] == top_score]
+        if len(candidates) == 1:
+            break
+    return (random.choice(candidates), "heuristic-based move")
+
+def choose_master_move(player, board):
+    # 3-by-3 positions are looked up in the precomputed perfect-play table
+    if get_num_rows(board) == perfect_play._num_rows:
+        return (perfect_play.get_best_move(player, board), "perfect-play table")
+    # larger boards use alpha-beta search within a fixed time budget per move
+    (pos, score, depth) = solver.get_solver(get_num_rows(board), player).search(player, board)
+    return (pos, "alpha-beta search (depth " + str(depth) + ")")
+
+def choose_mcts_move(player, board):
+    # monte carlo tree search within a fixed time budget per move
+    (pos, playouts, elapsed) = mcts.search(player, board)
+    return (pos, "monte carlo tree search (" + str(playouts) + " playouts, " +
+            str(int(playouts / elapsed)) + " playouts/s)")
 
 def choose_p2_move(player, board, mode):
     if mode is _pvp:
         return choose_player_move(player, board)
     if mode is _beginner:
         return choose_beginner_move(player, board)
+    if mode is _master:
+        return choose_master_move(player, board)
+    if mode is _mcts:
+        return choose_mcts_move(player, board)
     else:
         return choose_expert_move(player, board)
 
 def make_move(player, board, pos):
+    # checks the board for the position, for callers that do not track open positions
     if pos in get_available_moves(board):
+        set_square(player, board, pos)
+
+def set_square(player, board, pos):
+    if is_bit_board(board):
+        bitboard.make_move(player, board, pos)
+    else:
         board[pos] = player
 
-def play_turn(player, board, mode):
-    (pos, strat) = choose_player_move(player, board) if player is _p1 else choose_p2_move(player, board, mode)
-    make_move(player, board, pos)
+def play_move(player, board, pos, open_moves):
+    # make move and keep the set of open positions up to date
+    # the set of open positions is checked instead of scanning the board,
+    # and only the win states through the new position are checked
+    # return whether the move wins the game
+    if pos not in open_moves:
+        return False
+    set_square(player, board, pos)
+    open_moves.discard(pos)
+    return is_winning_move(player, board, pos)
+
+def is_winning_move(player, board, pos):
+    if is_bit_board(board):
+        return bitboard.is_winning_move(player, board, pos)
+    return any(all(board[p] == player for p in line) for line in get_lines_through(board, pos))
+
+def undo_move(player, board, pos):
+    if board[pos] == player:
+        if is_bit_board(board):
+            bitboard.undo_move(player, board, pos)
+        else:
+            board[pos] = _empty
+
+# game engine
+class Game:
+    # explicit state of a single game with no input or output, so the same
+    # engine can be driven by the console menu, the simulator or a server
+
+    def __init__(self, num_rows=3, starting_player=_p1, backend=_list_backend):
+        self.board = make_board(num_rows, backend)
+        self.player = starting_player
+        self.open_moves = set(get_available_moves(self.board))
+        # (player, position) for every move made so far
+        self.history = []
+        self.winner = None
+        # live win states through each open position, created on first use by
+        # get_threat_counter and then updated with every move and undo
+        self.threats = None
+
+    def legal_moves(self):
+        return sorted(self.open_moves) if self.result() is None else []
+
+    def play(self, pos):
+        # occupy pos for the player to move and pass the turn to the opponent
+        if self.result() is not None:
+            raise ValueError("game is already over")
+        if pos not in self.open_moves:
+            raise ValueError("position " + str(pos) + " is not available")
+
+        if play_move(self.player, self.board, pos, self.open_moves):
+            self.winner = self.player
+        if self.threats is not None:
+            self.threats.play(self.player, pos)
+        self.history.append((self.player, pos))
+        self.player = get_opponent(self.player)
+
+    def undo(self):
+        # take back the last move and return its position
+        if not self.history:
+            raise ValueError("no moves to undo")
+
+        (player, pos) = self.history.pop()
+        undo_move(player, self.board, pos)
+        self.open_moves.add(pos)
+        if self.threats is not None:
+            self.threats.undo(player, pos)
+        self.winner = None
+        self.player = player
+        return pos
+
+    def get_threat_counter(self):
+        # return the threat counter for this game, replaying the moves so far only the
+        # first time, after which play and undo keep it up to date
+        if self.threats is None:
+            self.threats = threats.ThreatCounter(get_win_state_table(get_num_rows(self.board)), (_p1, _p2))
+            for (player, pos) in self.history:
+                self.threats.play(player, pos)
+        return self.threats
+
+    def result(self):
+        # return winning player id, _tie for a full board with no winner,
+        # or None while the game is still in progress
+        if self.winner is not None:
+            return self.winner
+        return _tie if not self.open_moves else None
+
+# console front-end
+def play_turn(game, mode):
+    player = game.player
+    (pos, strat) = choose_player_move(player, game.board) if player is _p1 else choose_p2_move(player, game.board, mode)
+    game.play(pos)
 
     print("\n" + get_marker(player) + " occupies position " + str(pos))
     print("Method: " + strat)
-    print_board(board)
-
-    winner = get_winner(board)
-    if len(get_available_moves(board)) > 0 and not winner:
-        play_turn(get_opponent(player), board, mode)
-    else:
-        print(get_marker(winner) + " Wins" if winner else
-              "Tie Game!")
-        if input("\nPlay Again? (y/n) ").lower() == "y":
-            menu()
+    print_board(game.board)
 
 # menu
-def start_game(starting_player, board, mode):
-    play_turn(starting_player, board, mode)
+def start_game(starting_player, num_rows, mode):
+    game = Game(num_rows, starting_player)
+    while game.result() is None:
+        play_turn(game, mode)
 
-def menu():
-    num_rows = 3
-    starting_player = _p1
-    mode = _expert
-    
-    print("\nTic-Tac-Toe")
-    print("(1) Player vs Computer")
-    print("(2) Player vs Player")
-    print("(3) 4-by-4 Grid")
-    print("(4) Quit")
-    
-    choice = input("Select an option: ")
+    winner = game.result()
+    print(get_marker(winner) + " Wins" if winner != _tie else
+          "Tie Game!")
+
+def select_difficulty(title):
+    # return the mode of the selected computer player, or None to go back
+    print("\n" + title)
+    print("(1) Beginner")
+    print("(2) Expert")
+    print("(3) Master")
+    print("(4) Monte Carlo")
+    print("(5) [Go Back]")
+
+    choice = input("Select a difficulty: ")
     try:
         choice = int(choice)
     except ValueError:
-        print("Invalid selection. Please try again.")
-        menu()
-        return
+        return None
 
     if choice not in range(1, 5):
-        print("Selection out of range. Please try again")
-        menu()
-        return
+        return None
+    return (_beginner, _expert, _master, _mcts)[choice - 1]
 
-    if choice == 1:
-        print("\nPlayer vs Computer")
-        print("(1) Beginner")
-        print("(2) Expert")
-        print("(3) [Go Back]")
+def select_game():
+    # return (starting player, number of rows, mode) for the selected game,
+    # or None to quit
+    while True:
+        num_rows = 3
+        starting_player = _p1
+        mode = _expert
 
-        choice_2 = input("Select a difficulty: ")
+        print("\nTic-Tac-Toe")
+        print("(1) Player vs Computer")
+        print("(2) Player vs Player")
+        print("(3) 4-by-4 Grid")
+        print("(4) Quit")
+
+        choice = input("Select an option: ")
         try:
-            choice_2 = int(choice_2)
+            choice = int(choice)
         except ValueError:
-            menu()
+            print("Invalid selection. Please try again.")
+            continue
+
+        if choice not in range(1, 5):
+            print("Selection out of range. Please try again")
+            continue
+
+        if choice == 1:
+            mode = select_difficulty("Player vs Computer")
+            if mode is None:
+                continue
+
+            if input("Go first? (y/n) ").lower == "y":
+                starting_player = _p1
+            else:
+                starting_player = _p2
+        elif choice == 2:
+            mode = _pvp
+        elif choice == 3:
+            num_rows = 4
+            mode = select_difficulty("4-by-4 Grid")
+            if mode is None:
+                continue
+        elif choice == 4:
+            return None
+
+        return (starting_player, num_rows, mode)
+
+def menu():
+    while True:
+        settings = select_game()
+        if settings is None:
             return
-            
-        if choice_2 not in range(1, 3):
-            menu()
+
+        start_game(*settings)
+        if input("\nPlay Again? (y/n) ").lower() != "y":
             return
-        mode = _beginner if choice_2 == 1 else _expert
 
-        if input("Go first? (y/n) ").lower == "y":
-            starting_player = _p1
-        else:
-            starting_player = _p2
-    elif choice == 2:
-        mode = _pvp
-    elif choice == 3:
-        num_rows = 4
-    elif choice == 4:
-        return
-
-    start_game(starting_player, make_board(num_rows), mode)
-
-menu()
-        
+if __name__ == "__main__":
+    menu()
@@ -0,0 +1,154 @@
+"""
+Precomputed perfect-play table for the 3-by-3 tic-tac-toe game
+
+Every position is indexed by a base-3 key in which the digit for board
+position pos is 0 if it is empty, 1 if it is held by the player to move and 2
+if it is held by the other player. Keying on the player to move rather than on
+fixed player ids means a single table serves either side and either starting
+player.
+
+Each table entry is a single byte:
+    bits 0-3: best position to occupy (1 to 9), 0 for positions with no move
+    bits 4-5: game value for the player to move, 1 = loss, 2 = draw, 3 = win
+
+Running this file rebuilds the table. Loading the table builds it first if the
+file is missing, then maps it into memory so that a lookup is one key
+computation and one byte read.
+"""
+
+import mmap
+import os
+from functools import lru_cache
+
+_num_rows = 3
+_num_positions = _num_rows ** 2
+_num_keys = 3 ** _num_positions
+
+_magic = b"TTT3"
+_version = 1
+_header_size = 8
+
+_table_file = os.path.join(os.path.dirname(os.path.abspath(__file__)), "ttt3.bin")
+
+_lines = [(1, 2, 3), (4, 5, 6), (7, 8, 9), (1, 4, 7), (2, 5, 8), (3, 6, 9), (1, 5, 9), (3, 5, 7)]
+_powers = tuple([0] + [3 ** (pos - 1) for pos in range(1, _num_positions + 1)])
+
+# value codes
+_loss = 1
+_draw = 2
+_win = 3
+
+# keys
+def get_key(player, board):
+    # input: id of player to move, board in the ["board", 0, ...] layout
+    # output: base-3 key of the board from the point of view of the player to move
+    key = 0
+    for pos in range(1, _num_positions + 1):
+        if board[pos] == player:
+            key += _powers[pos]
+        elif board[pos]:
+            key += 2 * _powers[pos]
+    return key
+
+def get_digits(key):
+    return [0] + [key // _powers[pos] % 3 for pos in range(1, _num_positions + 1)]
+
+def swap_sides(key):
+    # key of the same position seen from the other player
+    digits = get_digits(key)
+    return sum(_powers[pos] * (0 if digits[pos] == 0 else 3 - digits[pos])
+               for pos in range(1, _num_positions + 1))
+
+def has_line(digits, digit):
+    return any(all(digits[pos] == digit for pos in line) for line in _lines)
+
+# solving
+@lru_cache(maxsize=None)
+def solve(key):
+    # input: key of a position where nobody has won yet
+    # output: return (score, best position) for the player to move, where
+    #         score > 0 is a win, score < 0 is a loss and larger magnitudes
+    #         mean the game ends sooner
+    digits = get_digits(key)
+    open_positions = [pos for pos in range(1, _num_positions + 1) if digits[pos] == 0]
+    if not open_positions:
+        return (0, 0)
+
+    best = None
+    for pos in open_positions:
+        new_key = key + _powers[pos]
+        digits[pos] = 1
+        if has_line(digits, 1):
+            score = len(open_positions)
+        else:
+            score = -solve(swap_sides(new_key))[0]
+        digits[pos] = 0
+        if best is None or score > best[0]:
+            best = (score, pos)
+    return best
+
+def is_reachable(digits):
+    # the player to move has either as many stones as the other player or one fewer
+    own = digits.count(1)
+    other = digits.count(2)
+    return other - own in (0, 1) and not has_line(digits, 1) and not has_line(digits, 2)
+
+def build_table(filename=_table_file):
+    table = bytearray(_num_keys)
+    for key in range(_num_keys):
+        digits = get_digits(key)
+        if not is_reachable(digits) or 0 not in digits[1:]:
+            continue
+        (score, pos) = solve(key)
+        value = _win if score > 0 else _loss if score < 0 else _draw
+        table[key] = value << 4 | pos
+
+    # write to a temporary file first so that processes loading the table
+    # at the same time never see a partially written file
+    temp_filename = filename + "." + str(os.getpid())
+    with open(temp_filename, "wb") as outfile:
+        outfile.write(_magic + bytes([_version, _num_rows, 0, 0]))
+        outfile.write(table)
+    os.replace(temp_filename, filename)
+    return filename
+
+# loading
+_table = None
+
+def load_table(filename=_table_file):
+    # map the table file into memory, building it first if it is missing or outdated
+    global _table
+    if _table is not None:
+        return _table
+
+    if not is_valid_table(filename):
+        build_table(filename)
+    with open(filename, "rb") as infile:
+        _table = mmap.mmap(infile.fileno(), 0, access=mmap.ACCESS_READ)
+    return _table
+
+def is_valid_table(filename):
+    try:
+        with open(filename, "rb") as infile:
+            header = infile.read(_header_size)
+        return header[:4] == _magic and header[4] == _version and \
+            os.path.getsize(filename) == _header_size + _num_keys
+    except (FileNotFoundError, IndexError):
+        return False
+
+# lookup
+def get_entry(player, board):
+    return load_table()[_header_size + get_key(player, board)]
+
+def get_best_move(player, board):
+    # return best position for the player to move, or None if the game is over
+    pos = get_entry(player, board) & 15
+    return pos if pos else None
+
+def get_value(player, board):
+    # return 1 for a win, 0 for a draw and -1 for a loss under perfect play
+    value = get_entry(player, board) >> 4
+    return None if not value else value - _draw
+
+if __name__ == "__main__":
+    print("Table written to " + build_table())
@@ -0,0 +1,242 @@
+"""
+Asyncio server hosting concurrent tic-tac-toe games against the AI strategies
+
+Every connection is a session with its own Game, so no state is shared between
+games. Move searches run in a process pool, so a slow search only delays its
+own session while other sessions keep being served.
+
+The protocol is line based. Requests from the client:
+    NEW <rows> <mode> <first>   start a game, mode is beginner, expert, master
+                                or mcts and first is player or computer
+    MOVE <pos>                  occupy a position, the computer replies right away
+    UNDO                        take back the last move of each side
+    BOARD                       show the board
+    QUIT                        close the session
+Responses from the server, one line each:
+    OK [...]                    request accepted
+    MOVE <pos>                  move made by the computer
+    BOARD <cells>               board contents, one character per position
+    RESULT <win|loss|tie>       game over, from the point of view of the client
+    ERR <message>               request rejected
+
+usage: python server.py --port 8765 or python server.py --unix /tmp/ttt.sock
+"""
+
+import argparse
+import asyncio
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import mcts
+import p2_7194 as game
+
+# the client always plays _p1 and the computer _p2
+_client = game._p1
+_computer = game._p2
+
+_modes = {
+    "beginner": game._beginner,
+    "expert": game._expert,
+    "master": game._master,
+    "mcts": game._mcts,
+    }
+
+# modes cheap enough to run on the event loop instead of in the pool
+_inline_modes = (game._beginner,)
+
+_max_rows = 10
+_max_line = 256
+
+# returned by Session.read_line for a line longer than _max_line, which has been skipped
+_line_too_long = object()
+
+def choose_computer_move(mode, player, board):
+    # runs in a worker process
+    if mode is game._mcts:
+        # the server's pool already spreads work over the cores
+        (pos, playouts, elapsed) = mcts.search(player, board, workers=1)
+        return pos
+    return game.choose_p2_move(player, board, mode)[0]
+
+class Session:
+    # state of a single client connection
+
+    def __init__(self, server, reader, writer):
+        self.server = server
+        self.reader = reader
+        self.writer = writer
+        self.game = None
+        self.mode = None
+
+    async def send(self, line):
+        self.writer.write((line + "\n").encode())
+        await self.writer.drain()
+
+    # return the next line, b"" at the end of the stream, or _line_too_long for a line longer
+    # than _max_line
+    # the stream is opened with the same limit, so a longer line is never read whole, and
+    # everything up to and including its newline is skipped, so the rest of it is not read
+    # as the next line
+    async def read_line(self):
+        try:
+            line = await self.reader.readuntil(b"\n")
+        except asyncio.IncompleteReadError as e:
+            return e.partial
+        except asyncio.LimitOverrunError as e:
+            await self.skip_line(e.consumed)
+            return _line_too_long
+        return _line_too_long if len(line) > _max_line else line
+
+    async def skip_line(self, count):
+        # discard count buffered bytes and the rest of the line they belong to
+        while True:
+            await self.reader.readexactly(count)
+            try:
+                await self.reader.readuntil(b"\n")
+                return
+            except asyncio.LimitOverrunError as e:
+                count = e.consumed
+
+    async def run(self):
+        try:
+            while True:
+                line = await self.read_line()
+                if not line:
+                    return
+                if line is _line_too_long:
+                    await self.send("ERR line too long")
+                    continue
+                words = line.decode(errors="replace").split()
+                if not words:
+                    continue
+                command = words[0].upper()
+                if command == "QUIT":
+                    await self.send("OK bye")
+                    return
+                handler = self.server.handlers.get(command)
+                if handler is None:
+                    await self.send("ERR unknown command " + words[0])
+                else:
+                    await handler(self, words[1:])
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self.server.sessions.discard(self)
+            self.writer.close()
+
+    async def handle_new(self, args):
+        try:
+            (num_rows, mode, first) = (int(args[0]), _modes[args[1].lower()], args[2].lower())
+        except (IndexError, ValueError, KeyError):
+            await self.send("ERR usage: NEW <rows> <" + "|".join(_modes) + "> <player|computer>")
+            return
+        if num_rows not in range(3, _max_rows + 1) or first not in ("player", "computer"):
+            await self.send("ERR usage: NEW <rows> <" + "|".join(_modes) + "> <player|computer>")
+            return
+
+        self.game = game.Game(num_rows, _client if first == "player" else _computer)
+        self.mode = mode
+        await self.send("OK new game")
+        if self.game.player == _computer:
+            await self.computer_move()
+
+    async def handle_move(self, args):
+        if self.game is None or self.game.result() is not None:
+            await self.send("ERR no game in progress")
+            return
+        try:
+            self.game.play(int(args[0]))
+        except (IndexError, ValueError):
+            await self.send("ERR illegal move")
+            return
+
+        await self.send("OK")
+        if not await self.send_result():
+            await self.computer_move()
+
+    async def handle_undo(self, args):
+        if self.game is None or not self.game.history:
+            await self.send("ERR nothing to undo")
+            return
+        # take back moves until it is the client's turn again
+        self.game.undo()
+        while self.game.history and self.game.player != _client:
+            self.game.undo()
+        await self.send("OK")
+        if self.game.player != _client:
+            await self.computer_move()
+
+    async def handle_board(self, args):
+        if self.game is None:
+            await self.send("ERR no game in progress")
+            return
+        await self.send("BOARD " + "".join([game.get_marker(self.game.board[pos]).replace(" ", ".")
+                                            for pos in range(1, len(self.game.board))]))
+
+    async def computer_move(self):
+        board = list(self.game.board)
+        if self.mode in _inline_modes:
+            pos = choose_computer_move(self.mode, _computer, board)
+        else:
+            loop = asyncio.get_running_loop()
+            pos = await loop.run_in_executor(self.server.pool, choose_computer_move,
+                                             self.mode, _computer, board)
+        self.game.play(pos)
+        await self.send("MOVE " + str(pos))
+        await self.send_result()
+
+    async def send_result(self):
+        # report the result if the game is over, and return whether it is
+        result = self.game.result()
+        if result is None:
+            return False
+        await self.send("RESULT " + ("tie" if result == game._tie else
+                                     "win" if result == _client else "loss"))
+        return True
+
+class GameServer:
+
+    def __init__(self, workers=None):
+        self.pool = ProcessPoolExecutor(max_workers=workers or os.cpu_count())
+        self.sessions = set()
+        self.handlers = {
+            "NEW": Session.handle_new,
+            "MOVE": Session.handle_move,
+            "UNDO": Session.handle_undo,
+            "BOARD": Session.handle_board,
+            }
+
+    async def handle_connection(self, reader, writer):
+        session = Session(self, reader, writer)
+        self.sessions.add(session)
+        await session.run()
+
+    async def serve(self, host="127.0.0.1", port=8765, path=None):
+        if path:
+            server = await asyncio.start_unix_server(self.handle_connection, path=path, limit=_max_line)
+        else:
+            server = await asyncio.start_server(self.handle_connection, host, port, limit=_max_line)
+        async with server:
+            await server.serve_forever()
+
+    def close(self):
+        self.pool.shutdown()
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve tic-tac-toe games against the computer")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--unix", help="listen on a unix socket at this path instead of TCP")
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    server = GameServer(args.workers)
+    try:
+        asyncio.run(server.serve(args.host, args.port, args.unix))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+
+if __name__ == "__main__":
+    main()
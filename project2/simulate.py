@@ -0,0 +1,187 @@
+"""
+Headless self-play simulator for comparing tic-tac-toe strategies
+
+Games are played without any input or printing, split into chunks and spread
+over a process pool. Every chunk is seeded from the base seed and its own
+index, and the searching strategies get a fixed number of nodes or playouts
+per move instead of a time limit, and start every chunk with an empty
+transposition table, so a run gives the same results regardless of the number
+of workers, how busy the machine is, or the order in which chunks finish.
+
+usage: python simulate.py expert beginner --games 1000 --rows 3 --workers 4
+"""
+
+import argparse
+import importlib
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import mcts
+import p2_7194 as game
+import perfect_play
+import solver
+
+# strategies written for the original 3-by-3 game in tic-tac-toe.py
+tic_tac_toe = importlib.import_module("tic-tac-toe")
+
+_chunk_size = 50
+
+# search budgets per move, roughly what the time limits of the interactive game allow
+_master_nodes = 20000
+_mcts_playouts = 10000
+
+# solvers of the current chunk by board size and player, keeping their transposition tables between moves
+_solvers = {}
+
+# strategy adapters, each taking (player, board, game in progress)
+def choose_state_space_move(player, board, state):
+    if game.get_num_rows(board) != 3:
+        raise ValueError("state-space strategy only supports 3-by-3 boards")
+    # the game updates its state space with every move, so it is never rebuilt here
+    (pos, strat) = tic_tac_toe.state_space_strategy(player, board, state.get_threat_counter())
+    return (pos, strat)
+
+def choose_table_move(player, board, state):
+    if game.get_num_rows(board) != 3:
+        raise ValueError("table strategy only supports 3-by-3 boards")
+    (pos, strat) = tic_tac_toe.table_strategy(player, board)
+    return (pos, strat)
+
+def choose_budget_master_move(player, board, state):
+    num_rows = game.get_num_rows(board)
+    if num_rows == perfect_play._num_rows:
+        return game.choose_master_move(player, board)
+    if (num_rows, player) not in _solvers:
+        _solvers[(num_rows, player)] = solver.Solver(num_rows, time_limit=None, node_limit=_master_nodes)
+    (pos, score, depth) = _solvers[(num_rows, player)].search(player, board)
+    return (pos, "alpha-beta search")
+
+def choose_serial_mcts_move(player, board, state):
+    # games already run in parallel, so each search stays in its own process
+    # the seed comes from the chunk's random state
+    (pos, playouts, elapsed) = mcts.search(player, board, time_limit=None, playouts=_mcts_playouts,
+                                           workers=1, seed=random.getrandbits(32))
+    return (pos, "monte carlo tree search")
+
+def board_strategy(choose):
+    # adapter for strategies that only need the board
+    return lambda player, board, state : choose(player, board)
+
+# available strategies by name, each taking (player, board, game in progress) and returning (position, method)
+_strategies = {
+    "beginner": board_strategy(game.choose_beginner_move),
+    "expert": board_strategy(game.choose_expert_move),
+    "master": choose_budget_master_move,
+    "mcts": choose_serial_mcts_move,
+    "state-space": choose_state_space_move,
+    "table": choose_table_move,
+    }
+
+# input: names of the two strategies, board size, starting player
+# output: return (winning strategy index or None for a tie, move latencies for each strategy)
+def play_game(strategies, num_rows, first):
+    players = (game._p1, game._p2)
+    state = game.Game(num_rows, players[first])
+    latencies = ([], [])
+
+    while state.result() is None:
+        turn = players.index(state.player)
+        start = time.perf_counter()
+        (pos, strat) = _strategies[strategies[turn]](state.player, state.board, state)
+        latencies[turn].append(time.perf_counter() - start)
+        state.play(pos)
+
+    result = state.result()
+    return (None if result == game._tie else players.index(result), latencies)
+
+# input: names of the two strategies, board size, index of first game, number of games, base seed
+# output: return (wins for each strategy, ties, move latencies for each strategy)
+def play_chunk(strategies, num_rows, first_game, num_games, seed):
+    # seed from the chunk rather than the worker so results do not depend on scheduling
+    random.seed(seed * 1000003 + first_game)
+    _solvers.clear()
+    wins = [0, 0]
+    ties = 0
+    latencies = ([], [])
+    for i in range(first_game, first_game + num_games):
+        # strategies alternate going first
+        (winner, game_latencies) = play_game(strategies, num_rows, i % 2)
+        if winner is None:
+            ties += 1
+        else:
+            wins[winner] += 1
+        latencies[0].extend(game_latencies[0])
+        latencies[1].extend(game_latencies[1])
+    return (wins, ties, latencies)
+
+def simulate(strategies, num_games, num_rows=3, workers=None, seed=0):
+    # input: names of the two strategies, number of games, board size, pool size, base seed
+    # output: return dict of results for the whole run
+    for name in strategies:
+        if name not in _strategies:
+            raise KeyError("unknown strategy: " + name)
+
+    chunks = [(i, min(_chunk_size, num_games - i)) for i in range(0, num_games, _chunk_size)]
+    wins = [0, 0]
+    ties = 0
+    latencies = ([], [])
+
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(play_chunk, strategies, num_rows, first_game, size, seed)
+                   for (first_game, size) in chunks]
+        for future in futures:
+            (chunk_wins, chunk_ties, chunk_latencies) = future.result()
+            wins[0] += chunk_wins[0]
+            wins[1] += chunk_wins[1]
+            ties += chunk_ties
+            latencies[0].extend(chunk_latencies[0])
+            latencies[1].extend(chunk_latencies[1])
+    elapsed = time.perf_counter() - start
+
+    return {
+        "strategies": strategies,
+        "games": num_games,
+        "rows": num_rows,
+        "wins": wins[0] / num_games,
+        "draws": ties / num_games,
+        "losses": wins[1] / num_games,
+        "games_per_second": num_games / elapsed if elapsed else float("inf"),
+        "latency": [get_percentiles(l) for l in latencies],
+        }
+
+def get_percentiles(values, percentiles=(50, 90, 99, 100)):
+    # nearest-rank percentiles of the given values
+    values = sorted(values)
+    if not values:
+        return {p : None for p in percentiles}
+    return {p : values[max(0, -(-p * len(values) // 100) - 1)] for p in percentiles}
+
+def print_report(results):
+    (a, b) = results["strategies"]
+    print("{0} vs {1}, {2} games on a {3}-by-{3} board".format(a, b, results["games"], results["rows"]))
+    print("{0} wins: {1:.1%}".format(a, results["wins"]))
+    print("draws: {0:.1%}".format(results["draws"]))
+    print("{0} wins: {1:.1%}".format(b, results["losses"]))
+    print("games per second: {0:.1f}".format(results["games_per_second"]))
+    for name, latency in zip(results["strategies"], results["latency"]):
+        print("{0} move latency (ms): ".format(name) +
+              ", ".join("p{0} {1:.3f}".format(p, latency[p] * 1000) if latency[p] is not None
+                        else "p{0} -".format(p) for p in latency))
+
+def main():
+    parser = argparse.ArgumentParser(description="Play tic-tac-toe strategies against each other")
+    parser.add_argument("first", choices=sorted(_strategies))
+    parser.add_argument("second", choices=sorted(_strategies))
+    parser.add_argument("--games", type=int, default=1000)
+    parser.add_argument("--rows", type=int, default=3)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    print_report(simulate((args.first, args.second), args.games, args.rows, args.workers, args.seed))
+
+if __name__ == "__main__":
+    main()
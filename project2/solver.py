@@ -0,0 +1,240 @@
+"""
+Alpha-beta search engine for the N-by-N tic-tac-toe game in p2_7194.py
+
+- Positions are searched with negamax and alpha-beta pruning on bitboards
+- Each position is hashed with Zobrist keys under all 8 symmetries of the
+  board, and the smallest key is used so that equivalent positions share a
+  single entry in the transposition table
+- The transposition table has a fixed number of slots, so memory use does not
+  grow with the length of the game or the size of the search
+- Iterative deepening is used so that a move from the last completed depth is
+  always available once the time or node budget runs out
+"""
+
+import random
+import time
+from functools import lru_cache
+
+import bitboard
+
+# scores
+_win_score = 1 << 62
+_mate_bound = _win_score - 1000
+
+# transposition table entry flags
+_exact = 0
+_lower = 1
+_upper = 2
+
+# default budget for a single move
+_default_time_limit = 1.0
+_default_table_bits = 18
+
+class SearchTimeout(Exception):
+    pass
+
+# board symmetries
+@lru_cache(maxsize=None)
+def get_symmetries(num_rows):
+    # each symmetry is a tuple mapping bit index i to the bit index of its image
+    n = num_rows - 1
+    transforms = [lambda r, c: (r, c),
+                  lambda r, c: (c, n - r),
+                  lambda r, c: (n - r, n - c),
+                  lambda r, c: (n - c, r),
+                  lambda r, c: (r, n - c),
+                  lambda r, c: (n - r, c),
+                  lambda r, c: (c, r),
+                  lambda r, c: (n - c, n - r)]
+    symmetries = []
+    for transform in transforms:
+        image = []
+        for i in range(num_rows ** 2):
+            (r, c) = transform(i // num_rows, i % num_rows)
+            image.append(r * num_rows + c)
+        symmetries.append(tuple(image))
+    return tuple(symmetries)
+
+@lru_cache(maxsize=None)
+def get_inverse_symmetries(num_rows):
+    inverses = []
+    for image in get_symmetries(num_rows):
+        inverse = [0] * len(image)
+        for i, j in enumerate(image):
+            inverse[j] = i
+        inverses.append(tuple(inverse))
+    return tuple(inverses)
+
+# zobrist keys
+@lru_cache(maxsize=None)
+def get_zobrist_keys(num_rows):
+    # keys[color][i] for stones of either color on bit index i
+    # keys are seeded per board size so that hashes are reproducible
+    rng = random.Random(num_rows)
+    return tuple(tuple(rng.getrandbits(64) for i in range(num_rows ** 2)) for color in range(2))
+
+@lru_cache(maxsize=None)
+def get_symmetric_zobrist_keys(num_rows):
+    # keys[color][i][k] is the key of a stone on bit index i seen through symmetry k
+    keys = get_zobrist_keys(num_rows)
+    symmetries = get_symmetries(num_rows)
+    return tuple(tuple(tuple(keys[color][image[i]] for image in symmetries)
+                       for i in range(num_rows ** 2))
+                 for color in range(2))
+
+_side_key = random.Random(0).getrandbits(64)
+
+@lru_cache(maxsize=None)
+def get_move_order(num_rows):
+    # bit indices ordered by the number of win lines through them, most first
+    incidence = bitboard.get_incidence_masks(num_rows)
+    return tuple(sorted(range(num_rows ** 2), key=lambda i: -len(incidence[i + 1])))
+
+class Solver:
+    # searches positions for a single player, whose stones are hashed as
+    # color 0 while the stones of the other player are hashed as color 1
+
+    def __init__(self, num_rows, time_limit=_default_time_limit, node_limit=None,
+                 table_bits=_default_table_bits):
+        self.num_rows = num_rows
+        self.time_limit = time_limit
+        self.node_limit = node_limit
+        self.table_mask = (1 << table_bits) - 1
+        self.table = [None] * (1 << table_bits)
+
+        self.keys = get_symmetric_zobrist_keys(num_rows)
+        self.symmetries = get_symmetries(num_rows)
+        self.inverses = get_inverse_symmetries(num_rows)
+        self.win_masks = bitboard.get_win_masks(num_rows)
+        self.incidence = bitboard.get_incidence_masks(num_rows)
+        self.move_order = get_move_order(num_rows)
+
+        self.nodes = 0
+        self.deadline = None
+
+    # input: id of player to move, board in either backend
+    # output: return (position, score, depth) for the best move found within the budget
+    def search(self, player, board):
+        if not isinstance(board, bitboard.BitBoard):
+            board = bitboard.BitBoard.from_list(board)
+        own = board.stones.get(player, 0)
+        other = board.get_occupied() & ~own
+        empty = bitboard.get_full_mask(self.num_rows) & ~(own | other)
+
+        hashes = [0] * 8
+        for color, mask in ((0, own), (1, other)):
+            for pos in bitboard.get_positions(mask):
+                self.toggle(hashes, color, pos - 1)
+
+        self.nodes = 0
+        self.deadline = time.perf_counter() + self.time_limit if self.time_limit else None
+
+        moves = [i for i in self.move_order if empty >> i & 1]
+        best = (moves[0] + 1, 0, 0)
+        max_depth = len(moves)
+        for depth in range(1, max_depth + 1):
+            try:
+                (score, move) = self.negamax(own, other, 0, hashes, depth, 0,
+                                             -_win_score - 1, _win_score + 1)
+            except SearchTimeout:
+                break
+            best = (move + 1, score, depth)
+            if abs(score) >= _mate_bound:
+                break
+        return best
+
+    def toggle(self, hashes, color, i):
+        keys = self.keys[color][i]
+        for k in range(8):
+            hashes[k] ^= keys[k]
+
+    def get_key(self, hashes, side):
+        # smallest hash over all symmetries, and the symmetry that produced it
+        k = min(range(8), key=hashes.__getitem__)
+        return (hashes[k] ^ (_side_key if side else 0), k)
+
+    def evaluate(self, me, them):
+        # static score for the side to move from the win lines still open to either side
+        score = 0
+        for line in self.win_masks:
+            if not line & them:
+                score += 1 << (2 * bin(line & me).count("1"))
+            elif not line & me:
+                score -= 1 << (2 * bin(line & them).count("1"))
+        return score
+
+    def negamax(self, me, them, side, hashes, depth, ply, alpha, beta):
+        # me/them are the stones of the side to move and of the other side
+        # side is 0 when the solver's player is to move
+        # return (score, bit index of best move) from the point of view of the side to move
+        self.nodes += 1
+        if self.node_limit and self.nodes > self.node_limit:
+            raise SearchTimeout()
+        if self.deadline and not self.nodes & 1023 and time.perf_counter() > self.deadline:
+            raise SearchTimeout()
+
+        empty = bitboard.get_full_mask(self.num_rows) & ~(me | them)
+        if not empty:
+            return (0, None)
+        if depth == 0:
+            return (self.evaluate(me, them), None)
+
+        (key, k) = self.get_key(hashes, side)
+        slot = key & self.table_mask
+        entry = self.table[slot]
+        tt_move = None
+        if entry and entry[0] == key:
+            (_, entry_depth, value, flag, move) = entry
+            tt_move = self.inverses[k][move] if move is not None else None
+            if entry_depth >= depth:
+                value = value - ply if value >= _mate_bound else value + ply if value <= -_mate_bound else value
+                if flag == _exact or \
+                   (flag == _lower and value >= beta) or \
+                   (flag == _upper and value <= alpha):
+                    return (value, tt_move)
+
+        moves = [i for i in self.move_order if empty >> i & 1]
+        if tt_move is not None and empty >> tt_move & 1:
+            moves.remove(tt_move)
+            moves.insert(0, tt_move)
+
+        # take an immediate win without searching further
+        for i in moves:
+            mine = me | (1 << i)
+            for line in self.incidence[i + 1]:
+                if mine & line == line:
+                    return (_win_score - ply - 1, i)
+
+        original_alpha = alpha
+        best_score = -_win_score - 1
+        best_move = moves[0]
+        color = side
+        for i in moves:
+            self.toggle(hashes, color, i)
+            try:
+                (score, _) = self.negamax(them, me | (1 << i), 1 - side, hashes, depth - 1,
+                                          ply + 1, -beta, -alpha)
+            finally:
+                self.toggle(hashes, color, i)
+            score = -score
+            if score > best_score:
+                best_score = score
+                best_move = i
+            if score > alpha:
+                alpha = score
+            if alpha >= beta:
+                break
+
+        flag = _upper if best_score <= original_alpha else _lower if best_score >= beta else _exact
+        value = best_score + ply if best_score >= _mate_bound else \
+                best_score - ply if best_score <= -_mate_bound else best_score
+        self.table[slot] = (key, depth, value, flag, self.symmetries[k][best_move])
+        return (best_score, best_move)
+
+# one solver per board size and player, so the transposition table is kept between moves
+_solvers = {}
+
+def get_solver(num_rows, player):
+    if (num_rows, player) not in _solvers:
+        _solvers[(num_rows, player)] = Solver(num_rows)
+    return _solvers[(num_rows, player)]
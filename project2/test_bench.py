@@ -0,0 +1,21 @@
+import bench
+
+def test_every_pass_gets_freshly_prepared_input():
+    # each call marks its prepared input, so a reused input would show up as already used
+    used = []
+    def function(player, board, prepared):
+        used.append(prepared["used"])
+        prepared["used"] = True
+    def prepare(player, board, state):
+        return {"used": False}
+    positions = bench.make_positions(4, 5, 0)
+    result = bench.run_benchmark(function, lambda prepared : 0, prepare, positions, 0)
+    assert used == [False] * 10
+    assert result["calls"] == 5
+
+def test_work_is_counted_per_call():
+    results = bench.run_suite((3, 4), 5)["benchmarks"]
+    # an open game on a 3-by-3 board has all 8 win states scanned by the list backend
+    assert results["get_winner/3"]["work_per_call"] == 8
+    assert results["mcts.search/4"]["work_per_call"] == bench._mcts_playouts
+    assert 0 < results["solver.search/4"]["work_per_call"] <= bench._solver_nodes + 1
@@ -0,0 +1,31 @@
+import random
+
+import mnk
+import p2_7194 as game
+
+def rescan_candidates(game_state):
+    # open positions with a stone within the radius, found by scanning the whole board
+    return sorted([pos for pos in game_state.open_moves
+                   if any([game_state.board[q] != game._empty for q in game_state.neighborhoods[pos]])])
+
+def test_candidates_follow_play_and_undo():
+    rng = random.Random(3)
+    for (num_rows, num_columns, k) in ((15, 15, 5), (6, 9, 4)):
+        game_state = mnk.MNKGame(num_rows, num_columns, k)
+        for i in range(400):
+            if game_state.history and (rng.random() < 0.3 or game_state.result() is not None):
+                game_state.undo()
+            else:
+                game_state.play(rng.choice(game_state.legal_moves()))
+            if game_state.history:
+                assert game_state.candidate_moves() == rescan_candidates(game_state)
+
+def test_completes_and_blocks_lines():
+    game_state = mnk.MNKGame(9, 9, 4)
+    for pos in (1, 11, 2, 12, 3):
+        game_state.play(pos)
+    # the opponent has three in a row on the top line and must block it
+    assert mnk.choose_mnk_move(game_state.player, game_state)[0] == 4
+    game_state.play(13)
+    # left open, the first player completes its line rather than blocking 11, 12, 13
+    assert mnk.choose_mnk_move(game_state.player, game_state)[0] == 4
@@ -0,0 +1,33 @@
+import p2_7194 as game
+import perfect_play
+
+def get_positions():
+    # every position reachable in a game that nobody has won and that still has an open position,
+    # with the player to move as game._p1
+    for key in range(perfect_play._num_keys):
+        digits = perfect_play.get_digits(key)
+        if perfect_play.is_reachable(digits) and 0 in digits[1:]:
+            yield ["board"] + [(game._empty, game._p1, game._p2)[d] for d in digits[1:]]
+
+def get_move_value(player, board, pos):
+    # value for player of playing pos under perfect play, from the table
+    board = list(board)
+    board[pos] = player
+    if game.get_winner(board) == player:
+        return 1
+    if game._empty not in board[1:]:
+        return 0
+    return -perfect_play.get_value(game.get_opponent(player), board)
+
+def test_table_is_rebuilt_the_same(tmp_path):
+    filename = perfect_play.build_table(str(tmp_path / "ttt3.bin"))
+    assert perfect_play.is_valid_table(filename)
+    with open(filename, "rb") as infile:
+        assert infile.read() == perfect_play.load_table()[:]
+
+def test_table_moves_keep_the_value():
+    for board in get_positions():
+        value = perfect_play.get_value(game._p1, board)
+        pos = perfect_play.get_best_move(game._p1, board)
+        assert board[pos] == game._empty
+        assert get_move_value(game._p1, board, pos) == value
@@ -0,0 +1,47 @@
+import asyncio
+
+import server
+
+# send each request in turn on one connection, returning the lines received after each,
+# given the number of response lines expected for every request
+def talk(requests):
+    async def run():
+        game_server = server.GameServer(workers=1)
+        listener = await asyncio.start_server(game_server.handle_connection, "127.0.0.1", 0,
+                                              limit=server._max_line)
+        port = listener.sockets[0].getsockname()[1]
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        responses = []
+        for (data, lines) in requests:
+            writer.write(data)
+            await writer.drain()
+            responses.append([(await asyncio.wait_for(reader.readline(), 5)).decode().strip()
+                              for i in range(lines)])
+        writer.close()
+        listener.close()
+        await listener.wait_closed()
+        game_server.close()
+        return responses
+    return asyncio.run(run())
+
+def test_errors():
+    usage = "ERR usage: NEW <rows> <beginner|expert|master|mcts> <player|computer>"
+    assert talk([(b"MOVE 1\n", 1), (b"UNDO\n", 1), (b"BOARD\n", 1), (b"NEW 2 beginner player\n", 1),
+                 (b"NEW 3 grandmaster player\n", 1), (b"JUMP\n", 1), (b"QUIT\n", 1)]) == \
+        [["ERR no game in progress"], ["ERR nothing to undo"], ["ERR no game in progress"], [usage],
+         [usage], ["ERR unknown command JUMP"], ["OK bye"]]
+
+def test_game():
+    responses = talk([(b"NEW 3 beginner player\n", 1), (b"MOVE 5\n", 2), (b"MOVE 5\n", 1),
+                      (b"UNDO\n", 1), (b"BOARD\n", 1)])
+    assert responses[0] == ["OK new game"]
+    assert responses[1][0] == "OK" and responses[1][1].startswith("MOVE ")
+    assert responses[2] == ["ERR illegal move"]
+    assert responses[3] == ["OK"]
+    assert responses[4] == ["BOARD " + "." * 9]
+
+def test_line_too_long_keeps_session():
+    # one line longer than the stream limit, and one that fits the limit but not _max_line
+    assert talk([(b"x" * (10 * server._max_line) + b"\n", 1), (b"BOARD\n", 1),
+                 (b"y" * server._max_line + b"\n", 1), (b"NEW 3 beginner player\n", 1)]) == \
+        [["ERR line too long"], ["ERR no game in progress"], ["ERR line too long"], ["OK new game"]]
@@ -0,0 +1,19 @@
+import simulate
+
+def play_chunk(strategies, num_rows, first_game, num_games):
+    (wins, ties, latencies) = simulate.play_chunk(strategies, num_rows, first_game, num_games, 7)
+    return (wins, ties, [len(l) for l in latencies])
+
+def test_chunk_results_do_not_depend_on_earlier_chunks(monkeypatch):
+    # a worker may run any chunks before this one, the results of a chunk must stay the same
+    monkeypatch.setattr(simulate, "_mcts_playouts", 300)
+    monkeypatch.setattr(simulate, "_master_nodes", 1000)
+    for (strategies, num_rows) in ((("mcts", "beginner"), 3), (("master", "beginner"), 4)):
+        alone = play_chunk(strategies, num_rows, 10, 6)
+        play_chunk(strategies, num_rows, 0, 4)
+        assert play_chunk(strategies, num_rows, 10, 6) == alone
+
+def test_same_results_for_any_number_of_workers():
+    runs = [simulate.simulate(("expert", "beginner"), 120, 3, workers) for workers in (1, 3)]
+    assert [(r["wins"], r["draws"], r["losses"]) for r in runs[1:]] == \
+           [(runs[0]["wins"], runs[0]["draws"], runs[0]["losses"])] * (len(runs) - 1)
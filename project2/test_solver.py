@@ -0,0 +1,19 @@
+import p2_7194 as game
+import perfect_play
+import solver
+from test_perfect_play import get_move_value, get_positions
+
+def test_agrees_with_perfect_play_table():
+    # searched to the end, the solver finds the value of every 3-by-3 position and a move keeping it
+    for board in get_positions():
+        (pos, score, depth) = solver.Solver(3, time_limit=None, table_bits=10).search(game._p1, board)
+        value = perfect_play.get_value(game._p1, board)
+        assert (score > 0) - (score < 0) == value
+        assert get_move_value(game._p1, board, pos) == value
+
+def test_stops_at_node_limit():
+    board = ["board"] + [game._empty] * 16
+    search = solver.Solver(4, time_limit=None, node_limit=500, table_bits=10)
+    (pos, score, depth) = search.search(game._p1, board)
+    assert board[pos] == game._empty and depth >= 1
+    assert search.nodes <= 501
@@ -0,0 +1,111 @@
+"""
+Incremental threat counters for win-state analysis
+
+For each player and each open position, the counter keeps how many of the
+player's live win states (lines not blocked by the other player) pass through
+that position, bucketed by how many more positions the player still needs to
+complete the state. Making or undoing a move only touches the lines through
+the position played, so choosing a move from the counts is a single scan over
+the open positions.
+"""
+
+class ThreatCounter:
+
+    # input: list of win states as tuples of positions, ids of the two players
+    def __init__(self, lines, players):
+        self.lines = [tuple(line) for line in lines]
+        self.players = tuple(players)
+        self.positions = sorted(set([pos for line in self.lines for pos in line]))
+
+        # indices of the lines passing through each position
+        self.lines_through = {pos : [] for pos in self.positions}
+        for i, line in enumerate(self.lines):
+            for pos in line:
+                self.lines_through[pos].append(i)
+
+        # player occupying each position, 0 for open positions
+        self.cells = {pos : 0 for pos in self.positions}
+
+        # number of stones each player has on each line
+        self.stones = {pl : [0] * len(self.lines) for pl in self.players}
+
+        # counts[pl][pos][k] is the number of live lines of pl through open position pos
+        # that need k more positions to complete
+        max_length = max([len(line) for line in self.lines])
+        self.counts = {pl : {pos : [0] * (max_length + 1) for pos in self.positions}
+                       for pl in self.players}
+        for line in self.lines:
+            for pos in line:
+                for pl in self.players:
+                    self.counts[pl][pos][len(line)] += 1
+
+        # live[pl][k] is the number of live lines of pl that need k more positions
+        self.live = {pl : [0] * (max_length + 1) for pl in self.players}
+        for line in self.lines:
+            for pl in self.players:
+                self.live[pl][len(line)] += 1
+
+        # running total of count lookups, read by the benchmarks
+        self.lookups = 0
+
+    def get_other(self, player):
+        return self.players[1] if player == self.players[0] else self.players[0]
+
+    def get_count(self, player, pos, needed):
+        # number of live lines of player through pos that need exactly needed more positions
+        self.lookups += 1
+        counts = self.counts[player][pos]
+        return counts[needed] if needed < len(counts) else 0
+
+    def is_open(self, pos):
+        return self.cells[pos] == 0
+
+    def has_won(self, player, pos):
+        # whether player completes a line through pos
+        return any([self.stones[player][i] == len(self.lines[i]) for i in self.lines_through[pos]])
+
+    def play(self, player, pos):
+        # occupy pos for player and update the counts of every line through it
+        other = self.get_other(player)
+        for i in self.lines_through[pos]:
+            line = self.lines[i]
+            empties = [q for q in line if self.cells[q] == 0]
+            if self.stones[other][i] == 0:
+                # line stays live for player, with one fewer position needed
+                needed = len(line) - self.stones[player][i]
+                self.live[player][needed] -= 1
+                self.live[player][needed - 1] += 1
+                for q in empties:
+                    self.counts[player][q][needed] -= 1
+                    if q != pos:
+                        self.counts[player][q][needed - 1] += 1
+            if self.stones[player][i] == 0:
+                # line was live for the other player and is now blocked
+                needed = len(line) - self.stones[other][i]
+                self.live[other][needed] -= 1
+                for q in empties:
+                    self.counts[other][q][needed] -= 1
+            self.stones[player][i] += 1
+        self.cells[pos] = player
+
+    def undo(self, player, pos):
+        # reverse a previous call to play(player, pos)
+        other = self.get_other(player)
+        self.cells[pos] = 0
+        for i in self.lines_through[pos]:
+            line = self.lines[i]
+            self.stones[player][i] -= 1
+            empties = [q for q in line if self.cells[q] == 0]
+            if self.stones[other][i] == 0:
+                needed = len(line) - self.stones[player][i]
+                self.live[player][needed] += 1
+                self.live[player][needed - 1] -= 1
+                for q in empties:
+                    self.counts[player][q][needed] += 1
+                    if q != pos:
+                        self.counts[player][q][needed - 1] -= 1
+            if self.stones[player][i] == 0:
+                needed = len(line) - self.stones[other][i]
+                self.live[other][needed] += 1
+                for q in empties:
+                    self.counts[other][q][needed] += 1
@@ -19,6 +19,10 @@ Program modified by Thomas Li on 12 Sep 2019
 
 import random
 
+import p2_7194
+import perfect_play
+import threats
+
 
 def make_board():
     return ['board', 0, 0, 0, 0, 0, 0, 0, 0, 0]
@@ -47,71 +51,41 @@ def print_board(board):
     print('\t-----------------'.center(10))
     print_row(board[7], board[8], board[9])
 
-def make_move(player, pos, board):
-    global state_space
-    state_space = update_state_space(player, pos, state_space)
-    board[pos] = player
-    return board
-
-def sum_triplet(board, triplet):
-    return board[triplet[0]] + board[triplet[1]] + board[triplet[2]]
-
-def compute_sums (board):
-    return [sum_triplet(board, triplet) for triplet in _triplets]
-  
-
-def winner_p (board):
-    sums = compute_sums(board)
-    return 3 * _computer in sums or 3 * _opponent in sums
-
-def opponent_move(board):
-#    print('in opponent:')
-#    print(board)
-    pos = read_a_legal_move(board)
-    new_board = make_move(_opponent, pos, board)
-    print_board(new_board)
-    if winner_p(new_board):
-        print('You win!')
-    elif board_full_p(new_board):
-        print('Tie game.')
-    else:
-        computer_move(new_board)
+def opponent_move(game):
+    pos = read_a_legal_move(game.board)
+    game.play(pos)
+    print_board(game.board)
 
 def read_a_legal_move(board):
-    pos = int(input('Your move: (enter a number between 1 and 9) '))
-    if not (type(pos) == int and (pos >= 1 and pos <=9)):
-        print('Invalid input.')
-        return read_a_legal_move(board)
-    elif board[pos] != 0:
-        print('That space is already occupied.')
-        return read_a_legal_move(board)
-    else:
-        return pos
-
-def board_full_p(board):
-    return not 0 in board
-
-def computer_move(board):
-#    print('In computer move:')
-#    print(board)
-    best_move = choose_best_move(board)
+    while True:
+        try:
+            pos = int(input('Your move: (enter a number between 1 and 9) '))
+        except ValueError:
+            pos = None
+        if not (type(pos) == int and (pos >= 1 and pos <=9)):
+            print('Invalid input.')
+        elif board[pos] != 0:
+            print('That space is already occupied.')
+        else:
+            return pos
+
+def computer_move(game, perfect=True):
+    best_move = choose_best_move(game, perfect)
     pos = best_move[0]
     strategy = best_move[1]
-    new_board = make_move(_computer, pos, board)
+    game.play(pos)
     print('My move: {} '.format(pos))
     print('My strategy: {} '.format(strategy))
-    print_board(new_board)
-    if winner_p(new_board):
-        print('I win!')
-    elif board_full_p(new_board):
-        print('Tie game.')
-    else:
-        return opponent_move(new_board)
+    print_board(game.board)
 
-def choose_best_move(board):
+def choose_best_move(game, perfect=True):
 #    print('choose move: ')
-#    print(board)
-    return state_space_strategy(_computer, board, state_space)
+#    print(game.board)
+    # perfect play comes from the precomputed table, and the easier opponent uses
+    # win-state analysis on the state space kept up to date by the game
+    if perfect:
+        return table_strategy(_computer, game.board)
+    return state_space_strategy(_computer, game.board, game.get_threat_counter())
 
 def random_move_strategy(board):
     pos = pick_random_empty_position(board)
@@ -152,134 +126,102 @@ def pick_random_empty_position(board):
     5) Randomly choosing an open position.
 
 - States available to both sides will be counted equally for now
+
+- Rather than keeping the list of states for each side, the state space keeps
+  per-position counts of the live states through every open position, grouped
+  by the number of positions still required, and updates only the states
+  through the position just occupied
 """
 
 # input: none
-# output: return dict containing the initial list of available winning states for both players
-#         each state is expressed as a tuple of the positions the player needs to occupy to win
+# output: return the initial state space, where every winning state is available to both players
 def init_state_space():
-    return {
-        _opponent: _triplets,
-        _computer: _triplets
-        }
-
-# input: identifier of player making move, position of move made, current list of states
-# output: return updated state space where moving player has winning state requirements updated
-#         and defending player has unavailable winning states removed from consideration
-def update_state_space(player, position, state_space):
-    return {
-        pl : new_space
-        for pl in state_space
-        for old_space in [state_space[pl]]
-        for new_space in
-        [[state for state in old_space if position not in state] if pl is not player
-          else [tuple([pos for pos in state if pos is not position]) for state in old_space]]
-        }
+    return threats.ThreatCounter(_triplets, (_opponent, _computer))
 
-state_space = init_state_space()
+# input: identifier of player making move, position of move made, current state space
+# output: return the state space, updated in place so that the moving player has winning state
+#         requirements updated and the defending player has unavailable winning states removed
+def update_state_space(player, position, state_space):
+    state_space.play(player, position)
+    return state_space
+
+# input: board
+# output: return the state space for both players as it stands on the given board
+# this replays every occupied position, so it is only for boards without a game in progress;
+# a game keeps its own state space up to date move by move (Game.get_threat_counter)
+def get_state_space(board):
+    state_space = init_state_space()
+    for pos in range(1, len(board)):
+        if board[pos] != 0:
+            update_state_space(board[pos], pos, state_space)
+    return state_space
 
 # input: identifier of player making move, board, current list of states
 # output: return move position selected through analysis of current winning requirements
 def state_space_strategy(player, board, state_space):
     strategy_name = "win-state analysis"
-    
-    # get dict of open positions and winning states that include them
-    available_moves = {
-        pos : pos_states
-        for pos in range(len(board)) if board[pos] == 0
-        for pos_states in
-        [{pl : pl_states
-          for pl in state_space
-          for pl_states in
-          [[state for state in state_space[pl] if pos in state]]}]
-        }
-
-    # get dict of open positions and the number of selection criteria they meet
+    opponent = state_space.get_other(player)
+
+    # open positions in board order
+    available_moves = [pos for pos in range(len(board)) if board[pos] == 0]
+
+    # number of states on either side through pos with the given number of positions still required
+    def count_states(pos, needed):
+        return state_space.get_count(_opponent, pos, needed) + state_space.get_count(_computer, pos, needed)
+
+    # open positions with the highest positive score, in board order
+    def get_top_moves(move_priorities):
+        top_score = max([0] + [move_priorities[pos] for pos in move_priorities])
+        return [pos for pos in move_priorities if move_priorities[pos] > 0 and move_priorities[pos] == top_score]
+
     # criteria will be checked in order of priority as listed earlier
     # lower-priority criteria will be checked if no single move can be selected from higher priority criteria
 
-    def get_move_priorities(get_score):
-        return {
-            pos : pos_score
-            for pos in available_moves
-            for pos_score in
-            [get_score(pos)]
-            }
-    move_priorities = get_move_priorities(lambda pos : 0)
-
     # 1)
-    move_priorities = get_move_priorities(lambda pos : len([states for states in available_moves[pos][player]
-                                          if len(states) == 1]))
-    selected_moves = [pos for pos in move_priorities if move_priorities[pos] > 0]
-    if len(selected_moves) > 0:
-        return [selected_moves[0], strategy_name]
+    for pos in available_moves:
+        if state_space.get_count(player, pos, 1) > 0:
+            return [pos, strategy_name]
 
     # 2)
-    move_priorities = get_move_priorities(lambda pos : sum([len([states for pl in state_space
-                                          if pl is not player
-                                          for states in available_moves[pos][pl]
-                                          if len(states) == 1])]))
-    selected_moves = [pos for pos in move_priorities if move_priorities[pos] > 0]
-    if len(selected_moves) > 0:
-        return [selected_moves[0], strategy_name]
+    for pos in available_moves:
+        if state_space.get_count(opponent, pos, 1) > 0:
+            return [pos, strategy_name]
 
-    
     # 3)
-    move_priorities = get_move_priorities(lambda pos : sum([len([states for pl in state_space
-                                          for states in available_moves[pos][pl]
-                                          if len(states) == 2])]))
-    selected_moves = [pos for pos in move_priorities if move_priorities[pos] > 0]
-    if len(selected_moves) > 0:
-        selected_moves = sorted(selected_moves, key = lambda pos : move_priorities[pos], reverse = True)
-        selected_moves = [pos for pos in selected_moves
-                          if move_priorities[pos] >= move_priorities[selected_moves[0]]]
-        # account for ties
+    move_priorities = {pos : count_states(pos, 2) for pos in available_moves}
+    selected_moves = get_top_moves(move_priorities)
     if len(selected_moves) == 1:
         return [selected_moves[0], strategy_name]
 
     # 4)
-    move_priorities = get_move_priorities(lambda pos : move_priorities[pos] +
-                                          sum([len([states for pl in state_space
-                                          for states in available_moves[pos][pl]
-                                          if len(states) == 3])]))
-    selected_moves = [pos for pos in move_priorities if move_priorities[pos] > 0]
-    if len(selected_moves) > 0:
-        selected_moves = sorted(selected_moves, key = lambda pos : move_priorities[pos], reverse = True)
-        selected_moves = [pos for pos in selected_moves
-                          if move_priorities[pos] >= move_priorities[selected_moves[0]]]
-        # account for ties
+    move_priorities = {pos : move_priorities[pos] + count_states(pos, 3) for pos in available_moves}
+    selected_moves = get_top_moves(move_priorities)
     if len(selected_moves) == 1:
         return [selected_moves[0], strategy_name]
-    
-    
+
     # 5)
     if len(selected_moves) > 0:
-        return [random.choice([m for m in selected_moves]), strategy_name]
-    return [random.choice([m for m in available_moves]), strategy_name]
+        return [random.choice(selected_moves), strategy_name]
+    return [random.choice(available_moves), strategy_name]
+
+# input: identifier of player making move, board
+# output: return move position looked up in the precomputed perfect-play table
+def table_strategy(player, board):
+    return [perfect_play.get_best_move(player, board), "perfect-play table"]
 
 def play_one_game():
-    global state_space
-    state_space = init_state_space()
     choice = input('Would you like to go first? (y/n)')
-    if choice == 'y':
-        opponent_move(make_board())
+    perfect = input('Play against the perfect player? (y/n)') != 'n'
+    game = p2_7194.Game(3, _opponent if choice == 'y' else _computer)
+    while game.result() is None:
+        if game.player == _opponent:
+            opponent_move(game)
+        else:
+            computer_move(game, perfect)
+
+    if game.result() == _opponent:
+        print('You win!')
+    elif game.result() == _computer:
+        print('I win!')
     else:
-        computer_move(make_board())
-
-
-
-
-    
-
-
-
-
-
-
-
-
-
-
-    
-  
-    
+        print('Tie game.')
@@ -0,0 +1,285 @@
+# Streaming reader for .arff files
+#
+# The header is read once, then data rows are read lazily and returned in chunks
+# of a fixed number of rows, so files larger than memory can be used for training
+# and testing. Within a chunk, nominal and string values are encoded as integers
+# and numeric values are stored as floats.
+#
+# - Nominal values are coded by their position in the declared list of values,
+#   with the missing value "?" given the code after the last declared value, so
+#   that it is counted like any other value (as it is when loading through scipy)
+# - String values are coded in order of first appearance
+# - Missing numeric values are stored as NaN
+# - Sparse rows such as {0 x, 3 "a b"} are expanded, with omitted attributes
+#   taking the first declared value for nominal attributes and 0 otherwise
+# - Values may be quoted with single or double quotes
+
+import re
+
+import numpy as np
+
+# indicators for the range of certain attributes
+_numeric = "numeric"
+_nominal = "nominal"
+_string = "string"
+
+_missing = "?"
+
+# number of rows in each chunk unless specified
+_defaultChunkSize = 65536
+
+# the file is read as bytes so that it can be split at byte offsets, and decoded line by line
+_encoding = "utf-8"
+
+# split a comma-separated list of values, removing quotes and surrounding spaces
+def split_values(line, separator=","):
+    if "'" not in line and '"' not in line:
+        return [x.strip() for x in line.split(separator)]
+
+    values = []
+    i = 0
+    while i >= 0:
+        value, i = scan_value(line, i, separator)
+        values.append(value)
+    return values
+
+# split the body of a sparse row, such as 0 x, 3 "a, b", into (index, value) pairs,
+# where values may be quoted after the index
+def split_sparse(body, separator=","):
+    items = []
+    i = 0
+    n = len(body)
+    while i >= 0:
+        while i < n and body[i] in " \t":
+            i += 1
+        start = i
+        while i < n and body[i] not in " \t" + separator:
+            i += 1
+        if i == start or i >= n or body[i] == separator:
+            raise SyntaxError("expected an index and a value in sparse row: {" + body + "}")
+        index = body[start:i]
+        value, i = scan_value(body, i, separator)
+        items.append((int(index), value))
+    return items
+
+# read the value starting at position i of line, which may be quoted, and return it along with
+# the position after the separator that follows it, or -1 if it is the last value in the line
+def scan_value(line, i, separator=","):
+    n = len(line)
+    while i < n and line[i] in " \t":
+        i += 1
+    if i < n and line[i] in "'\"":
+        quote = line[i]
+        i += 1
+        value = []
+        while i < n and line[i] != quote:
+            if line[i] == "\\" and i + 1 < n:
+                i += 1
+            value.append(line[i])
+            i += 1
+        if i >= n:
+            raise SyntaxError("unterminated quoted value: " + line)
+        end = line.find(separator, i + 1)
+        value = "".join(value)
+    else:
+        end = line.find(separator, i)
+        value = (line[i:] if end < 0 else line[i:end]).strip()
+    return value, end if end < 0 else end + 1
+
+# split an @attribute declaration into its name and the rest of the line, which follows
+# the name after a space or directly as a list of values, as in @attribute x{a,b}
+def split_declaration(line):
+    rest = line[len("@attribute"):].strip()
+    if rest[:1] in ("'", '"'):
+        end = rest.index(rest[0], 1)
+        return rest[1:end], rest[end + 1:].strip()
+    parts = re.split(r"\s+|(?=\{)", rest, maxsplit=1)
+    if len(parts) < 2 or not parts[0]:
+        raise SyntaxError("expected a name and a type in attribute declaration: " + line)
+    return parts[0], parts[1].strip()
+
+class ArffChunk:
+    # codes: integer array with one row per instance and one column per attribute (class last),
+    #        holding value codes for nominal and string attributes
+    # numbers: float array of the same shape holding numeric attribute values,
+    #          or None if the file has no numeric attributes
+    def __init__(self, codes, numbers):
+        self.codes = codes
+        self.numbers = numbers
+
+    def __len__(self):
+        return len(self.codes)
+
+class ArffReader:
+    # name of the relation and of each attribute, with the class attribute last
+    relation = ""
+    names = []
+
+    # type of each attribute, and for nominal and string attributes the list of values,
+    # where values[i][k] is the value with code k
+    types = []
+    values = []
+
+    # same fields as Dataset, with the class separated from the other attributes
+    attributeNames = ()
+    attributeTypes = ()
+    className = ""
+
+    # read the header of the file, raising FileNotFoundError or SyntaxError if it is invalid
+    def __init__(self, filename, chunkSize=_defaultChunkSize):
+        self.filename = filename
+        self.chunkSize = chunkSize
+        self.names = []
+        self.types = []
+        self.values = []
+
+        # position in the file where the data section starts
+        self.dataOffset = 0
+
+        with open(filename, "rb") as infile:
+            while True:
+                line = infile.readline()
+                if not line:
+                    raise SyntaxError("no @data section in " + filename)
+                line = line.decode(_encoding).strip()
+                lower = line.lower()
+                if not line or line.startswith("%"):
+                    continue
+                if lower.startswith("@relation"):
+                    self.relation = line[len("@relation"):].strip().strip("'\"")
+                elif lower.startswith("@attribute"):
+                    self.add_attribute(line)
+                elif lower.startswith("@data"):
+                    self.dataOffset = infile.tell()
+                    break
+                else:
+                    raise SyntaxError("unexpected line in header: " + line)
+
+        if len(self.names) < 2:
+            raise SyntaxError("expected at least one attribute and a class")
+
+        self.attributeNames = tuple(self.names[0:-1])
+        self.attributeTypes = tuple(self.types[0:-1])
+        self.className = self.names[-1]
+
+        # code of every value of each nominal and string attribute
+        self.codes = [{self.values[i][k] : k for k in range(len(self.values[i]))}
+                      for i in range(len(self.names))]
+
+    def add_attribute(self, line):
+        name, declaration = split_declaration(line)
+        if declaration.startswith("{"):
+            self.types.append(_nominal)
+            self.values.append(split_values(declaration[1:declaration.rindex("}")]) + [_missing])
+        elif declaration.lower() in ("numeric", "real", "integer"):
+            self.types.append(_numeric)
+            self.values.append([])
+        elif declaration.lower() == "string":
+            self.types.append(_string)
+            self.values.append([])
+        else:
+            raise SyntaxError("unsupported attribute type: " + declaration)
+        self.names.append(name)
+
+    # return the values of a sparse row as a full row
+    def expand_sparse(self, line):
+        row = [self.values[i][0] if self.types[i] == _nominal else "0" for i in range(len(self.names))]
+        body = line.strip()[1:-1].strip()
+        if body:
+            for index, value in split_sparse(body):
+                row[index] = value
+        return row
+
+    # return the values of a single data row, or None for blank and comment lines
+    def parse_row(self, line):
+        line = line.strip()
+        if not line or line.startswith("%"):
+            return None
+        row = self.expand_sparse(line) if line.startswith("{") else split_values(line)
+        if len(row) != len(self.names):
+            raise SyntaxError("expected {0} values in row: {1}".format(len(self.names), line))
+        return row
+
+    # encode the rows of a chunk
+    def encode(self, rows):
+        codes = np.zeros((len(rows), len(self.names)), dtype=np.int32)
+        numbers = None
+        if _numeric in self.types:
+            numbers = np.full((len(rows), len(self.names)), np.nan)
+
+        for i in range(len(self.names)):
+            column = [row[i] for row in rows]
+            if self.types[i] == _numeric:
+                numbers[:, i] = [np.nan if x == _missing else float(x) for x in column]
+            elif self.types[i] == _nominal:
+                try:
+                    codes[:, i] = [self.codes[i][x] for x in column]
+                except KeyError as e:
+                    raise SyntaxError("undeclared value {0} for attribute {1}".format(e, self.names[i]))
+            else:
+                # string values get new codes as they appear
+                for x in dict.fromkeys(column):
+                    if x not in self.codes[i]:
+                        self.codes[i][x] = len(self.values[i])
+                        self.values[i].append(x)
+                codes[:, i] = [self.codes[i][x] for x in column]
+        return ArffChunk(codes, numbers)
+
+    # yield the data rows of the file in chunks of at most chunkSize rows
+    def __iter__(self):
+        return self.read_range(self.dataOffset, None)
+
+    # return (start, end) byte offsets splitting the data section into about count parts,
+    # to be read separately with read_range
+    def get_shards(self, count):
+        with open(self.filename, "rb") as infile:
+            size = infile.seek(0, 2)
+        step = max(1, -(-(size - self.dataOffset) // count))
+        return [(start, min(start + step, size)) for start in range(self.dataOffset, size, step)]
+
+    # yield in chunks the data rows starting at offsets from start up to but not including end,
+    # or up to the end of the file if end is None
+    # rows crossing the boundaries of a range belong to the range in which they start, so
+    # consecutive ranges together read every row exactly once
+    # chunks end where they would when reading the whole file, given the index firstRow of the
+    # first row in the range, so the first chunk may be shorter
+    def read_range(self, start, end, firstRow=0):
+        rows = []
+        size = self.chunkSize - firstRow % self.chunkSize
+        for line in self.read_lines(start, end):
+            row = self.parse_row(line)
+            if row is None:
+                continue
+            rows.append(row)
+            if len(rows) == size:
+                yield self.encode(rows)
+                rows = []
+                size = self.chunkSize
+        if rows:
+            yield self.encode(rows)
+
+    # return the number of data rows in the same range as read_range, without parsing them
+    def count_rows(self, start, end):
+        count = 0
+        for line in self.read_lines(start, end):
+            line = line.strip()
+            if line and not line.startswith("%"):
+                count += 1
+        return count
+
+    # yield the lines starting at offsets from start up to but not including end
+    def read_lines(self, start, end):
+        with open(self.filename, "rb") as infile:
+            position = start
+            infile.seek(start)
+            if start > self.dataOffset:
+                # skip the rest of a row that started in the previous range
+                infile.seek(start - 1)
+                position = start - 1 + len(infile.readline())
+
+            while end is None or position < end:
+                line = infile.readline()
+                if not line:
+                    break
+                position += len(line)
+                yield line.decode(_encoding)
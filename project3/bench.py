@@ -0,0 +1,84 @@
+"""
+Benchmark for classifying many cases with the naive Bayes classifier
+
+Trains a classifier on an .arff file and times classifying its cases in four
+ways: one case at a time by get_posterior, as the classifier did before it was
+compiled, and with predict_batch given the cases as lists of strings, as an
+array of strings, and already encoded. Only encoded cases skip looking up
+every value, so the speedup over one case at a time depends on the form the
+cases come in, and every form is reported.
+
+usage: python bench.py data.arff [--cases 2000] [--repeat 5]
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+import p2_7194 as nb
+from arff_reader import ArffReader
+
+_default_cases = 2000
+_default_repeat = 5
+
+# return the attribute values of the first count cases of the file as lists of strings
+def read_cases(filename, count):
+    reader = ArffReader(filename)
+    cases = []
+    for line in reader.read_lines(reader.dataOffset, None):
+        row = reader.parse_row(line)
+        if row is not None:
+            cases.append(row[:-1])
+            if len(cases) == count:
+                break
+    return cases
+
+# return the best time per case in microseconds of calling function on cases repeat times
+def time_per_case(function, cases, repeat):
+    best = None
+    for i in range(repeat):
+        start = time.perf_counter()
+        function(cases)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best / len(cases) * 1e6
+
+def classify_one_at_a_time(classifier, cases):
+    classes = classifier.get_classes()
+    return [max(classes, key=lambda c : classifier.get_posterior(case, c)) for case in cases]
+
+def run_benchmark(filename, count=_default_cases, repeat=_default_repeat):
+    dataset = nb.Dataset()
+    if not dataset.get_from_arff(filename):
+        raise ValueError("cannot learn a classifier from " + filename)
+    classifier = nb.Classifier()
+    classifier.get_from_dataset(dataset)
+    cases = read_cases(filename, count)
+    compiled = classifier.get_compiled()
+    encoded = compiled.encode(cases)
+    numbers = compiled.encode_numbers(cases)
+
+    # one case at a time is slow, so it is timed once over a tenth of the cases
+    few = cases[:max(1, len(cases) // 10)]
+    results = {"one at a time": time_per_case(lambda X : classify_one_at_a_time(classifier, X), few, 1)}
+    results["batch, lists"] = time_per_case(compiled.predict_batch, cases, repeat)
+    results["batch, array"] = time_per_case(compiled.predict_batch, np.array(cases), repeat)
+    results["batch, encoded"] = time_per_case(lambda X : compiled.predict_codes(X, numbers), encoded, repeat)
+    return results
+
+def print_results(results):
+    base = results["one at a time"]
+    for name in results:
+        print("{0:16} {1:10.3f} us per case  {2:8.1f}x".format(name, results[name], base / results[name]))
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark classifying many cases")
+    parser.add_argument("filename")
+    parser.add_argument("--cases", type=int, default=_default_cases)
+    parser.add_argument("--repeat", type=int, default=_default_repeat)
+    args = parser.parse_args()
+    print_results(run_benchmark(args.filename, args.cases, args.repeat))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+import random
+
+import pytest
+
+_weather = """@relation weather
+@attribute outlook {sunny,overcast,rainy}
+@attribute temperature {hot,mild,cool}
+@attribute humidity {high,normal}
+@attribute windy {TRUE,FALSE}
+@attribute play {yes,no}
+@data
+sunny,hot,high,FALSE,no
+sunny,hot,high,TRUE,no
+overcast,hot,high,FALSE,yes
+rainy,mild,high,FALSE,yes
+rainy,cool,normal,FALSE,yes
+rainy,cool,normal,TRUE,no
+overcast,cool,normal,TRUE,yes
+sunny,mild,high,FALSE,no
+sunny,cool,normal,FALSE,yes
+rainy,mild,normal,FALSE,yes
+sunny,mild,normal,TRUE,yes
+overcast,mild,high,TRUE,yes
+overcast,hot,normal,FALSE,yes
+rainy,mild,high,TRUE,no
+"""
+
+# the weather dataset, 14 cases with four nominal attributes
+@pytest.fixture
+def weather(tmp_path):
+    filename = tmp_path / "weather.arff"
+    filename.write_text(_weather)
+    return str(filename)
+
+# 300 generated cases of three classes, with nominal and numeric attributes and missing values,
+# and a comment and a sparse row among them
+@pytest.fixture
+def mixed(tmp_path):
+    rng = random.Random(0)
+    lines = ["@relation mixed", "@attribute colour {red,green,blue,'dark grey'}", "@attribute size numeric",
+             "@attribute weight real", "@attribute shape {round,square}", "@attribute kind {a,b,c}", "@data"]
+    for n in range(300):
+        kind = rng.choice("abc")
+        colour = rng.choice(["red", "green", "blue", "'dark grey'", "?"] if kind != "a" else ["red", "red", "blue"])
+        size = "?" if rng.random() < 0.1 else "{0:.3f}".format(rng.gauss("abc".index(kind), 1.0))
+        weight = "{0:.2f}".format(rng.gauss(10 * "abc".index(kind), 5.0))
+        lines.append(",".join([colour, size, weight, rng.choice(["round", "square"]), kind]))
+        if n == 100:
+            lines.append("% a comment between rows")
+    lines.append("{0 'dark grey', 2 3.5, 4 c}")
+    filename = tmp_path / "mixed.arff"
+    filename.write_text("\n".join(lines) + "\n")
+    return str(filename)
@@ -2,82 +2,549 @@
 # From 14 October 2019 to 3 November 2019
 
 # This is a program that can generate classification models for .arff files.
-# For the scope of this project, this program only handles nominal attribute values.
+# Nominal attributes are modelled by counting values and numeric attributes by a normal
+# distribution for each class.
 
-from scipy.io import arff
+import ast
+import functools
+import itertools
+import json
+import math
+import mmap
+import os
+import struct
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from arff_reader import ArffReader
 
 # indicators for the range of certain attributes
 _numeric = "numeric"
 _nominal = "nominal"
+_string = "string"
 
 # converting between bytes and strings
 _encoding = "ASCII"
 
+# cases scored per block in batch prediction, bounding the memory of intermediate arrays
+_batchSize = 65536
+
+# number of single-case classifications remembered by a compiled classifier
+_cacheSize = 65536
+
+# largest number of cases for which a decision table holding the class of every possible
+# case is built on request
+_decisionTableLimit = 1 << 20
+
+# when hashing is enabled, nominal attributes with more declared values than this are hashed
+# along with every string attribute
+_hashThreshold = 1024
+
+# fraction of the largest class variance of a numeric attribute added to every class variance,
+# so that attributes with a constant value in some class do not give infinite densities
+_varianceSmoothing = 1e-9
+
+# binary model files
+# - magic bytes, format version (uint32) and header length (uint64), little-endian
+# - JSON header with the attribute names and types, the class and value vocabularies,
+#   and the dtype, shape and offset of every array
+# - the arrays themselves, each contiguous and aligned to 8 bytes: the counts
+#   of the model, followed by the log probabilities of its compiled form
+_modelMagic = b"PYNB"
+_modelVersion = 2
+_modelPrefix = struct.Struct("<4sIQ")
+_modelAlignment = 8
+
 class Dataset:
-    # array of data items generated from scipy library
-    # can be accessed by index, returning the attributes for single item
-    # or by attribute label, returning every value of the attribute in the set
-    instances = []
-    
-    # all attributes are marked as either numeric (continuous) or nominal
-    # (discrete), with the range of values determined by what shows up in
-    # the dataset
-    attributeNames = ()
-    attributeTypes = ()
-
-    # since classification involves discrete labels (as opposed to prediction),
-    # the class is assumed to contain a set of nominal values
-    className = ""
-    classVals = ()
-    
+    # the instances are stored by column, one array per attribute followed by one for the class
+    # - nominal and string columns are dictionary-encoded: columns[i][n] is the index of the value
+    #   of instance n in vocabularies[i], stored in the narrowest unsigned integer type that holds
+    #   every index, so most columns take a single byte per instance
+    # - numeric columns are arrays of floats, with NaN for missing values, and have no vocabulary
+    def __init__(self):
+        self.size = 0
+        self.columns = []
+        self.vocabularies = []
+
+        # all attributes are marked as either numeric (continuous) or nominal
+        # (discrete), with the range of values determined by what shows up in
+        # the dataset
+        self.attributeNames = ()
+        self.attributeTypes = ()
+
+        # since classification involves discrete labels (as opposed to prediction),
+        # the class is assumed to contain a set of nominal values
+        self.className = ""
+        self.classVals = set()
+
+    def __len__(self):
+        return self.size
+
     # attempt to retrieve .arff file contents and convert into data object
     # return whether or not file operation was sucessful
+    # the file is read in chunks, each encoded straight into the compact columns
     def get_from_arff(self, filename):
         try:
-            data, metadata = arff.loadarff(filename)
-            labels = metadata.names()
-            types = metadata.types()
-            
-            self.instances = data
-            self.attributeNames = labels[0:-1]
-            self.className = labels[-1]
-            self.attributeTypes = types[0:-1]
+            reader = ArffReader(filename)
+            # the class has to be nominal, a numeric one is something to predict, not classify
+            if reader.types[-1] == _numeric:
+                return False
+            parts = [[] for i in range(len(reader.names))]
+            for chunk in reader:
+                for i in range(len(reader.names)):
+                    if reader.types[i] == _numeric:
+                        parts[i].append(chunk.numbers[:, i].copy())
+                    else:
+                        # string vocabularies grow while reading, so later chunks may need a wider type
+                        parts[i].append(chunk.codes[:, i].astype(get_code_type(len(reader.values[i]))))
 
-            self.classVals = set([X[-1] for X in data])
-            
-            return True
-        
-        except (FileNotFoundError, SyntaxError, StopIteration):
+        except (FileNotFoundError, IsADirectoryError, SyntaxError, ValueError):
             return False
 
+        self.columns = []
+        self.vocabularies = []
+        for i in range(len(reader.names)):
+            numeric = reader.types[i] == _numeric
+            dtype = float if numeric else get_code_type(len(reader.values[i]))
+            self.columns.append(np.concatenate(parts[i]).astype(dtype, copy=False) if parts[i] else
+                                np.empty(0, dtype=dtype))
+            self.vocabularies.append(None if numeric else list(reader.values[i]))
+        self.size = len(self.columns[-1])
+        self.attributeNames = reader.attributeNames
+        self.attributeTypes = reader.attributeTypes
+        self.className = reader.className
+
+        self.classVals = set([self.vocabularies[-1][k] for k in np.flatnonzero(np.bincount(self.columns[-1]))])
+
+        return True
+
+    # return a read-only view of the column of an attribute or of the class, by name
+    # nominal columns hold indices into get_vocabulary(name)
+    def get_column(self, name):
+        column = self.columns[self.get_position(name)].view()
+        column.flags.writeable = False
+        return column
+
+    # return the values indexed by a nominal column, or None for numeric attributes
+    def get_vocabulary(self, name):
+        return self.vocabularies[self.get_position(name)]
+
+    # return the position of an attribute or of the class among the columns
+    def get_position(self, name):
+        if name == self.className:
+            return len(self.attributeNames)
+        return list(self.attributeNames).index(name)
+
+    # return a dataset holding the selected instances of this one, given as indices or a mask
+    # the vocabularies are shared, so codes keep their meaning in the subset
+    def get_subset(self, selection):
+        subset = Dataset()
+        subset.columns = [column[selection] for column in self.columns]
+        subset.vocabularies = self.vocabularies
+        subset.size = len(subset.columns[-1]) if subset.columns else 0
+        subset.attributeNames = self.attributeNames
+        subset.attributeTypes = self.attributeTypes
+        subset.className = self.className
+        subset.classVals = self.classVals
+        return subset
+
 class Classifier:
-    # store inverse probabilities for each attribute value and class value
-    inverse = {}
+    # the model is kept as raw counts, so new cases can be added at any time, and
+    # probabilities are derived from the counts when needed
+    # - classVals[j] is the name of class j and classCounts[j] its number of cases
+    # - values[i][k] is value k of attribute i and counts[i][j][k] the number of cases
+    #   of class j with that value (None for numeric attributes)
+    # - for numeric attributes, moments[i][:, j] is the number of known values, their mean
+    #   and their sum of squared differences from the mean for class j (None for nominal attributes),
+    #   updated as in Welford's method so no values have to be kept
+    # - hashed attributes are counted by bucket instead of by value, hashed[i] being the number
+    #   of buckets (None for attributes counted by value), and counts[i] holds only the nonzero
+    #   counts as columns (class, bucket, count) sorted by class and bucket, so the size of the
+    #   model is bounded no matter how many distinct values occur
+    # - counts[i] and classCounts are views of buffers with room to grow, so adding a few
+    #   classes or values at a time does not copy the whole table
+    classVals = []
+    classCounts = None
+    values = []
+    counts = []
+    moments = []
+    hashed = []
 
     # store the names and types of each attribute label
     types = []
     labels = []
 
+    # number of buckets string and high-cardinality attributes are hashed into when training
+    # starts, 0 to count every attribute by value
+    hashBuckets = 0
+    hashThreshold = _hashThreshold
+
+    # inverse and prior probabilities and the mean and variance of numeric attributes,
+    # derived from the counts and kept until the counts change
+    cache = None
+
+    # compiled form of the model used for batch prediction, rebuilt after the model changes
+    compiled = None
+
+    # for the vocabulary of each attribute and then the class, the index of every value and
+    # the codes of the values of the last vocabulary cases were added from, built on first use
+    # and extended as values are added, so adding a chunk only looks up values that are new
+    coding = None
+
+    # store inverse probabilities for each attribute value and class value
+    @property
+    def inverse(self):
+        return self.get_probabilities()[0]
+
     # store prior probabilities of each class value
-    prior = {}
+    @property
+    def prior(self):
+        return self.get_probabilities()[1]
+
+    # start an empty model for cases with the given attributes, hashing attribute i into
+    # hashed[i] buckets where that is not None
+    def reset(self, types, labels, hashed=None):
+        self.types = types
+        self.labels = labels
+        self.hashed = list(hashed or [None] * len(types))
+        self.classVals = []
+        self.classCounts = np.zeros(0, dtype=np.int64)
+        self.values = [[] for i in range(len(types))]
+        self.counts = [None if types[i] == _numeric else
+                       np.zeros((0, 0) if self.hashed[i] is None else (3, 0), dtype=np.int64)
+                       for i in range(len(types))]
+        self.moments = get_empty_moments(types, 0)
+        self.coding = None
+        self.updated()
+
+    # return the number of buckets for each attribute given its type and vocabulary, or None for
+    # attributes counted by value, as set by hashBuckets and hashThreshold
+    def choose_hashed(self, types, vocabularies):
+        if not self.hashBuckets:
+            return [None] * len(types)
+        return [self.hashBuckets if types[i] == _string or
+                (types[i] != _numeric and len(vocabularies[i]) > self.hashThreshold) else None
+                for i in range(len(types))]
+
+    # drop everything derived from the counts after they change
+    def updated(self):
+        self.cache = None
+        self.compiled = None
+
+    # the coding refers to the vocabularies of the cases last added, which are not sent to workers
+    def __getstate__(self):
+        state = dict(self.__dict__)
+        state.pop("coding", None)
+        return state
+
+    # return the index of every value of vocabulary k of the model, attribute k or the class for -1
+    def get_index(self, k):
+        if self.coding is None:
+            self.coding = [[None, None, np.zeros(0, dtype=np.intp)] for i in range(len(self.values) + 1)]
+        if self.coding[k][0] is None:
+            vocabulary = (self.values + [self.classVals])[k]
+            self.coding[k][0] = {vocabulary[j] : j for j in range(len(vocabulary))}
+        return self.coding[k][0]
+
+    # return the codes in vocabulary k of the model of every value of source, appending the values
+    # that are not in it yet
+    # source is a vocabulary of the cases being added, such as those of a Dataset or an ArffReader,
+    # which is only ever appended to, so only the values added since the last call are looked up
+    def add_to_vocabulary(self, k, source):
+        index = self.get_index(k)
+        coding = self.coding[k]
+        if coding[1] is not source:
+            coding[1:] = [source, np.zeros(0, dtype=np.intp)]
+        known = len(coding[2])
+        if len(source) > known:
+            coding[2] = grow(coding[2], (len(source),))
+            coding[2][known:] = add_to_vocabulary((self.values + [self.classVals])[k], source[known:], index)
+        return coding[2]
 
     # obtain attribute instances and probabilities from dataset
-    def get_from_dataset(self, dataset):
-        self.inverse = {c.decode(_encoding) :
-                        [{x.decode(_encoding) :
-                        len([case for case in cases if case[i] == x]) / len(cases)
-                          for x in set(dataset.instances[dataset.attributeNames[i]])
-                          for cases in [[h for h in dataset.instances if h[-1] == c]]}
-                         for i in range(len(dataset.attributeNames))]
-                        for c in dataset.classVals}
-        self.types = dataset.attributeTypes
-        self.labels = dataset.attributeNames
-        self.prior = {c.decode(_encoding) :
-                      len([X for X in dataset.instances if X[-1] == c])
-                      / len(dataset.instances)
-                      for c in dataset.classVals}
+    # cases are added in chunks of the same size as when reading the file with an ArffReader,
+    # so numeric attributes get exactly the same moments either way
+    def get_from_dataset(self, dataset, chunkSize=_batchSize):
+        self.reset(dataset.attributeTypes, dataset.attributeNames,
+                   self.choose_hashed(dataset.attributeTypes, dataset.vocabularies))
+        for start in range(0, len(dataset), chunkSize):
+            self.partial_fit(dataset.get_subset(slice(start, start + chunkSize)))
+        return
+
+    # obtain attribute instances and probabilities from an ArffReader, one chunk at a time,
+    # so the dataset never has to fit in memory
+    def get_from_stream(self, reader):
+        self.reset(reader.attributeTypes, reader.attributeNames, self.choose_hashed(reader.attributeTypes, reader.values))
+        for chunk in reader:
+            self.partial_fit(chunk, reader)
         return
 
+    # obtain attribute instances and probabilities from an .arff file, split into shards that are
+    # counted in parallel by a pool of worker processes and then merged in order, since counts
+    # are additive the model is the same as one trained serially
+    # moments of numeric attributes are not exactly additive in floating point, so each shard
+    # is read in the chunks a serial reader would use, and the moments of the chunks are combined
+    # in file order, giving exactly the moments of get_from_stream with the same chunk size
+    def get_from_arff_parallel(self, filename, workers=None, chunkSize=_batchSize):
+        reader = ArffReader(filename, chunkSize)
+        workers = workers or os.cpu_count()
+        shards = reader.get_shards(workers)
+        self.reset(reader.attributeTypes, reader.attributeNames, self.choose_hashed(reader.attributeTypes, reader.values))
+        pool = None if workers == 1 else get_pool(workers)
+
+        # chunks are aligned by the index of the first row of each shard
+        firstRows = [0] * len(shards)
+        if _numeric in reader.attributeTypes and len(shards) > 1:
+            sizes = run_tasks(pool, count_rows, [(filename, start, end) for start, end in shards])
+            firstRows = np.cumsum([0] + sizes[:-1]).tolist()
+
+        results = run_tasks(pool, count_shard, [(filename, chunkSize, start, end, self.hashed, firstRow)
+                                                for (start, end), firstRow in zip(shards, firstRows)])
+        [self.merge(classifier) for classifier, pieces in results]
+        self.combine_shard_moments(results, chunkSize)
+        return
+
+    # set the moments of numeric attributes from the chunks of every shard, as returned by
+    # count_shard, combining them one chunk at a time in file order as partial_fit does
+    # chunks split between shards are joined before their moments are computed
+    def combine_shard_moments(self, results, chunkSize):
+        C = len(self.classVals)
+        self.moments = get_empty_moments(self.types, C)
+        pending = []
+        position = 0
+        for classifier, pieces in results:
+            classMap = get_codes(self.classVals, classifier.classVals)
+            for count, moments, classCodes, numbers in pieces:
+                if moments is not None:
+                    for i in range(len(moments)):
+                        if moments[i] is not None:
+                            table = np.zeros((3, C))
+                            table[:, classMap] = moments[i]
+                            self.moments[i] = combine_moments(self.moments[i], table)
+                else:
+                    pending.append((classMap[classCodes], numbers))
+                position += count
+                if pending and position % chunkSize == 0:
+                    self.add_pending_moments(pending)
+                    pending = []
+        if pending:
+            self.add_pending_moments(pending)
+        self.updated()
+        return
+
+    # combine the moments of a chunk given in pieces of (class codes, numeric values) with the model
+    def add_pending_moments(self, pending):
+        classCodes = np.concatenate([codes for codes, numbers in pending])
+        numbers = np.concatenate([numbers for codes, numbers in pending])
+        for i in range(len(self.moments)):
+            if self.moments[i] is not None:
+                self.moments[i] = combine_moments(self.moments[i],
+                                                  get_moments(classCodes, numbers[:, i], len(self.classVals)))
+        return
+
+    # add the counts of another classifier with the same attributes to this one
+    def merge(self, other):
+        if self.classCounts is None:
+            self.reset(other.types, other.labels, other.hashed)
+        if list(other.labels) != list(self.labels) or list(other.hashed) != list(self.hashed):
+            raise ValueError("classifiers do not have the same attributes")
+
+        classMap = add_to_vocabulary(self.classVals, other.classVals, self.get_index(-1))
+        C = len(self.classVals)
+        self.classCounts = grow(self.classCounts, (C,))
+        self.classCounts[classMap] += other.classCounts
+        for i in range(len(self.counts)):
+            if self.counts[i] is None:
+                continue
+            if self.hashed[i] is not None:
+                table = other.counts[i]
+                self.counts[i] = add_sparse_counts(self.counts[i], classMap[table[0]], table[1], table[2])
+                continue
+            valueMap = add_to_vocabulary(self.values[i], other.values[i], self.get_index(i))
+            self.counts[i] = grow(self.counts[i], (C, len(self.values[i])))
+            self.counts[i][np.ix_(classMap, valueMap)] += other.counts[i]
+        for i in range(len(self.moments)):
+            if self.moments[i] is None:
+                continue
+            moments = np.zeros((3, C))
+            moments[:, classMap] = other.moments[i]
+            self.moments[i] = combine_moments(grow(self.moments[i], (3, C)), moments)
+        self.updated()
+        return
+
+    # remove the counts of another classifier, trained on a subset of the cases of this one
+    def subtract(self, other):
+        if list(other.labels) != list(self.labels) or list(other.hashed) != list(self.hashed):
+            raise ValueError("classifiers do not have the same attributes")
+
+        classMap = get_codes(self.classVals, other.classVals)
+        self.classCounts = self.classCounts.copy()
+        self.classCounts[classMap] -= other.classCounts
+        for i in range(len(self.counts)):
+            if self.counts[i] is None:
+                continue
+            if self.hashed[i] is not None:
+                table = other.counts[i]
+                self.counts[i] = add_sparse_counts(self.counts[i], classMap[table[0]], table[1], -table[2])
+                if (self.counts[i][2] < 0).any():
+                    raise ValueError("classifier was not trained on a subset of these cases")
+                continue
+            self.counts[i] = self.counts[i].copy()
+            self.counts[i][np.ix_(classMap, get_codes(self.values[i], other.values[i]))] -= other.counts[i]
+            if (self.counts[i] < 0).any():
+                raise ValueError("classifier was not trained on a subset of these cases")
+        for i in range(len(self.moments)):
+            if self.moments[i] is None:
+                continue
+            moments = np.zeros((3, len(self.classVals)))
+            moments[:, classMap] = other.moments[i]
+            self.moments[i] = remove_moments(self.moments[i], moments)
+        if (self.classCounts < 0).any():
+            raise ValueError("classifier was not trained on a subset of these cases")
+        self.updated()
+        return
+
+    # return a copy of the model that can be updated without changing this one
+    def copy(self):
+        other = Classifier()
+        other.types = self.types
+        other.labels = self.labels
+        other.hashed = list(self.hashed)
+        other.classVals = list(self.classVals)
+        other.classCounts = None if self.classCounts is None else self.classCounts.copy()
+        other.values = [list(values) for values in self.values]
+        other.counts = [None if table is None else table.copy() for table in self.counts]
+        other.moments = [None if table is None else table.copy() for table in self.moments]
+        other.coding = None
+        other.cache = self.cache if self.classCounts is None else None
+        return other
+
+    # add a chunk of new cases to the counts, either a Dataset or an ArffChunk read by reader
+    # every column is integer-coded once and all (value, class) pairs are counted together,
+    # instead of rescanning the cases of each class for every attribute value
+    def partial_fit(self, chunk, reader=None):
+        source = chunk if reader is None else reader
+        if self.classCounts is None:
+            if self.cache is not None:
+                raise ValueError("model was loaded without counts and cannot be updated")
+            self.reset(source.attributeTypes, source.attributeNames,
+                       self.choose_hashed(source.attributeTypes, source.vocabularies if reader is None else reader.values))
+        if list(source.attributeNames) != list(self.labels):
+            raise ValueError("cases do not have the attributes of the model")
+
+        # both are already coded into vocabularies, so the codes are counted as they are
+        if reader is None:
+            vocabularies, codes = chunk.vocabularies, chunk.columns
+            numbers = chunk.columns
+        else:
+            vocabularies, codes = reader.values, chunk.codes.T
+            numbers = None if chunk.numbers is None else chunk.numbers.T
+        columns = [numbers[i] if self.counts[i] is None else (vocabularies[i], codes[i])
+                   for i in range(len(self.labels))]
+
+        self.add_counts(vocabularies[-1], codes[-1], columns)
+        return
+
+    # add cases given as codes into vocabularies: class classVals[classCodes[n]] for case n,
+    # and for nominal attribute i, value columns[i][0][columns[i][1][n]], or for numeric
+    # attribute i, value columns[i][n] with NaN for missing values
+    # values of hashed attributes are hashed once per vocabulary entry and counted by bucket
+    def add_counts(self, classVals, classCodes, columns):
+        classCodes = self.add_to_vocabulary(-1, classVals)[classCodes]
+        C = len(self.classVals)
+        self.classCounts = grow(self.classCounts, (C,))
+        self.classCounts += np.bincount(classCodes, minlength=C)
+        for i in range(len(columns)):
+            if self.counts[i] is None:
+                self.moments[i] = combine_moments(grow(self.moments[i], (3, C)),
+                                                  get_moments(classCodes, columns[i], C))
+                continue
+            if self.hashed[i] is not None:
+                buckets = hash_values(columns[i][0], self.hashed[i])[columns[i][1]]
+                self.counts[i] = add_sparse_counts(self.counts[i], classCodes, buckets)
+                continue
+            codes = self.add_to_vocabulary(i, columns[i][0])[columns[i][1]]
+            self.counts[i] = grow(self.counts[i], (C, len(self.values[i])))
+            np.add.at(self.counts[i], (classCodes, codes), 1)
+        self.updated()
+        return
+
+    # return (inverse, prior) derived from the counts, computing them on first use after an update
+    # as when the model was built directly from a dataset, only classes and values that occur
+    # are recorded, in sorted order
+    def get_probabilities(self):
+        if self.cache is not None:
+            return self.cache
+        if self.classCounts is None:
+            return ({}, {}, {})
+
+        present, seen = self.get_order()
+        inverse = {self.classVals[j] : [] for j in present}
+        for i in range(len(self.types)):
+            if self.hashed[i] is not None:
+                # hashed attributes are keyed by bucket, with only the buckets each class has cases in
+                table = self.counts[i]
+                bounds = np.searchsorted(table[0], np.arange(len(self.classVals) + 1))
+                for j in present:
+                    inverse[self.classVals[j]].append({int(table[1][n]) :
+                                                       int(table[2][n]) / int(self.classCounts[j])
+                                                       for n in range(bounds[j], bounds[j + 1])})
+                continue
+            for j in present:
+                # numeric attributes are not counted by value
+                inverse[self.classVals[j]].append({} if seen[i] is None else
+                                                  {self.values[i][k] :
+                                                   int(self.counts[i][j][k]) / int(self.classCounts[j])
+                                                   for k in seen[i]})
+
+        total = int(self.classCounts.sum())
+        prior = {self.classVals[j] : int(self.classCounts[j]) / total for j in present}
+
+        # (mean, variance) of each numeric attribute, None for classes with no known values
+        gaussians = {self.classVals[j] : [] for j in present}
+        for table in self.get_gaussians():
+            for j in present:
+                gaussians[self.classVals[j]].append(None if table is None or np.isnan(table[1][j]) else
+                                                    (float(table[0][j]), float(table[1][j])))
+        self.cache = (inverse, prior, gaussians)
+        return self.cache
+
+    # return for each numeric attribute an array with the mean and the smoothed variance of
+    # each class (NaN for classes with no known values), and None for nominal attributes
+    def get_gaussians(self):
+        gaussians = []
+        for moments in self.moments:
+            if moments is None:
+                gaussians.append(None)
+                continue
+            known = moments[0] > 0
+            variance = np.full(len(moments[0]), np.nan)
+            variance[known] = moments[2][known] / moments[0][known]
+            largest = variance[known].max() if known.any() else 0.0
+            variance += _varianceSmoothing * largest if largest > 0 else _varianceSmoothing
+            gaussians.append(np.array([np.where(known, moments[1], np.nan), variance]))
+        return gaussians
+
+    # return indices of the classes that occur, and for each attribute the indices of the values
+    # that occur (None for numeric attributes), both in sorted order, or for hashed attributes
+    # the buckets that occur
+    def get_order(self):
+        present = [j for j in sorted(range(len(self.classVals)), key=lambda j : self.classVals[j])
+                   if self.classCounts[j]]
+        seen = []
+        for i in range(len(self.types)):
+            if self.counts[i] is None:
+                seen.append(None)
+                continue
+            if self.hashed[i] is not None:
+                seen.append(np.unique(self.counts[i][1]).tolist())
+                continue
+            totals = self.counts[i].sum(axis=0)
+            seen.append([k for k in sorted(range(len(totals)), key=lambda k : self.values[i][k]) if totals[k]])
+        return present, seen
+
     # view the set of available classes
     def get_classes(self):
         return [c for c in self.inverse]
@@ -86,35 +553,155 @@ class Classifier:
     def get_unique_attribute_values(self, i):
         return [h for h in self.inverse[self.get_classes()[0]][i]]
 
-    # write .json file using classification data
+    # write binary model file, returning whether or not file operation was successful
+    def write_to_binary(self, filename):
+        if self.classCounts is None:
+            raise ValueError("model was loaded without counts and cannot be saved in binary form")
+        compiled = self.get_compiled()
+
+        arrays = [("classCounts", self.classCounts.astype("<i8"))]
+        arrays += [("counts/" + str(i), self.counts[i].astype("<i8"))
+                   for i in range(len(self.counts)) if self.counts[i] is not None]
+        arrays += [("moments/" + str(i), self.moments[i].astype("<f8"))
+                   for i in range(len(self.moments)) if self.moments[i] is not None]
+        arrays += [("logPrior", compiled.logPrior.astype("<f8"))]
+        arrays += [("logInverse/" + str(i), compiled.logInverse[i].astype("<f8"))
+                   for i in range(len(compiled.logInverse))]
+        arrays += [("gaussian/" + str(i), compiled.gaussians[i].astype("<f8"))
+                   for i in range(len(compiled.gaussians)) if compiled.gaussians[i] is not None]
+
+        header = {"types" : list(self.types),
+                  "labels" : list(self.labels),
+                  "hashed" : self.hashed,
+                  "classVals" : self.classVals,
+                  "values" : self.values,
+                  "compiledClasses" : compiled.classes,
+                  "compiledValues" : [list(codes) for codes in compiled.codes],
+                  "arrays" : []}
+
+        # offsets depend on the header length, so lay the arrays out relative to the start of the data
+        offset = 0
+        for name, array in arrays:
+            header["arrays"].append({"name" : name, "dtype" : array.dtype.str,
+                                     "shape" : list(array.shape), "offset" : offset})
+            offset += -(-array.nbytes // _modelAlignment) * _modelAlignment
+        headerBytes = json.dumps(header).encode("utf-8")
+        dataStart = -(-(_modelPrefix.size + len(headerBytes)) // _modelAlignment) * _modelAlignment
+
+        try:
+            # write to a temporary file first, so a process loading the model never sees a partial file
+            tempFilename = filename + "." + str(os.getpid())
+            with open(tempFilename, "wb") as outfile:
+                outfile.write(_modelPrefix.pack(_modelMagic, _modelVersion, len(headerBytes)))
+                outfile.write(headerBytes)
+                outfile.write(bytes(dataStart - _modelPrefix.size - len(headerBytes)))
+                for name, array in arrays:
+                    outfile.write(array.tobytes())
+                    outfile.write(bytes(-array.nbytes % _modelAlignment))
+            os.replace(tempFilename, filename)
+            return True
+
+        except FileNotFoundError:
+            return False
+
+    # attempt to map a binary model file into memory, without copying its arrays
+    # return whether or not file operation was successful
+    def get_from_binary(self, filename):
+        try:
+            with open(filename, "rb") as infile:
+                data = mmap.mmap(infile.fileno(), 0, access=mmap.ACCESS_READ)
+            if len(data) < _modelPrefix.size:
+                return False
+            magic, version, headerLength = _modelPrefix.unpack_from(data)
+            # version 1 files are the same without hashed attributes
+            if magic != _modelMagic or not 1 <= version <= _modelVersion:
+                return False
+            header = json.loads(data[_modelPrefix.size:_modelPrefix.size + headerLength].decode("utf-8"))
+            dataStart = -(-(_modelPrefix.size + headerLength) // _modelAlignment) * _modelAlignment
+
+            arrays = {}
+            for entry in header["arrays"]:
+                count = int(np.prod(entry["shape"]))
+                arrays[entry["name"]] = np.frombuffer(data, dtype=entry["dtype"], count=count,
+                                                      offset=dataStart + entry["offset"]).reshape(entry["shape"])
+
+            self.types = header["types"]
+            self.labels = header["labels"]
+            self.hashed = header.get("hashed") or [None] * len(self.labels)
+            self.classVals = header["classVals"]
+            self.values = header["values"]
+            self.coding = None
+            self.classCounts = arrays["classCounts"]
+            self.counts = [arrays.get("counts/" + str(i)) for i in range(len(self.labels))]
+            self.moments = [arrays.get("moments/" + str(i), moments) for i, moments in
+                            enumerate(get_empty_moments(self.types, len(self.classVals)))]
+            self.updated()
+            self.compiled = CompiledClassifier(header["compiledClasses"], arrays["logPrior"],
+                                               header["compiledValues"],
+                                               [arrays["logInverse/" + str(i)] for i in range(len(self.labels))],
+                                               [arrays.get("gaussian/" + str(i)) for i in range(len(self.labels))],
+                                               self.hashed)
+            return True
+
+        except (FileNotFoundError, IsADirectoryError, ValueError, KeyError):
+            return False
+
+    # export classification data as a .json file, readable but slow to load
     def write_to_file(self, filename):
         try:
             outfile = open(filename, "w")
             outfile.write(str({"inverse" : self.inverse,
                                "prior" : self.prior,
-                               "types" : self.types,
-                               "labels" : self.labels}))
+                               "types" : list(self.types),
+                               "labels" : list(self.labels),
+                               "hashed" : list(self.hashed),
+                               "counts" : None if self.classCounts is None else
+                                          {"classVals" : self.classVals,
+                                           "classCounts" : self.classCounts.tolist(),
+                                           "values" : self.values,
+                                           "counts" : [None if table is None else table.tolist()
+                                                       for table in self.counts],
+                                           "moments" : [None if table is None else table.tolist()
+                                                        for table in self.moments]}}))
             outfile.close()
             return True
 
         except FileNotFoundError:
             return False
     
-    # attempt to retrieve classification data from .json file
+    # attempt to retrieve classification data from an exported .json file
     # return whether or not file operation was successful
     def get_from_file(self, filename):
         try:
             infile = open(filename, "r")
-            data = eval(infile.read())
+            data = ast.literal_eval(infile.read())
             
-            self.inverse = data["inverse"]
-            self.prior = data["prior"]
             self.types = data["types"]
             self.labels = data["labels"]
+            self.hashed = data.get("hashed") or [None] * len(self.labels)
+            self.updated()
+            if data.get("counts") is None:
+                # older files hold only the probabilities
+                self.classCounts = None
+                self.cache = (data["inverse"], data["prior"], {})
+            else:
+                counts = data["counts"]
+                self.classVals = counts["classVals"]
+                self.coding = None
+                self.classCounts = np.array(counts["classCounts"], dtype=np.int64).reshape(-1)
+                self.values = counts["values"]
+                self.counts = [None if counts["counts"][i] is None else
+                               np.array(counts["counts"][i], dtype=np.int64).reshape(
+                                   len(self.classVals) if self.hashed[i] is None else 3, -1)
+                               for i in range(len(self.labels))]
+                self.moments = get_empty_moments(self.types, len(self.classVals))
+                if "moments" in counts:
+                    self.moments = [None if table is None else np.array(table, dtype=float).reshape(3, -1)
+                                    for table in counts["moments"]]
             
             return True
 
-        except (FileNotFoundError, SyntaxError):
+        except (FileNotFoundError, SyntaxError, ValueError):
             return False
 
     # get p(c) for a single classification c given classification data
@@ -125,8 +712,15 @@ class Classifier:
     def get_inverse(self, attributeIndex, x, c):
         # conditional set of attribute values classified as c
         if self.types[attributeIndex] == _numeric:
-            # continuous values - get probability through statisical methods
-            return 1
+            # continuous values - get probability density of a normal distribution
+            gaussians = self.get_probabilities()[2].get(c)
+            if gaussians is None or gaussians[attributeIndex] is None:
+                return 1
+            mean, variance = gaussians[attributeIndex]
+            return math.exp(-(x - mean) ** 2 / (2 * variance)) / math.sqrt(2 * math.pi * variance)
+        elif self.hashed[attributeIndex] is not None:
+            # hashed values - get probability of the bucket, which is 0 if no case of c fell in it
+            return self.inverse[c][attributeIndex].get(hash_value(x, self.hashed[attributeIndex]), 0.0)
         else:
             # discrete values - get probability through number of occurences
             return self.inverse[c][attributeIndex][x]
@@ -134,23 +728,732 @@ class Classifier:
     # get p(C|X) for a given instance X and a given class c
     def get_posterior(self, X, c):
         prob = self.get_prior(c)
-        for i in range(len(self.types) - 1):
-            prob *= self.get_inverse(i, X[i], c) if X[i] in self.get_unique_attribute_values(i) else 1
+        for i in range(len(self.types)):
+            if self.types[i] == _numeric:
+                x = to_number(X[i])
+                prob *= self.get_inverse(i, x, c) if x is not None else 1
+            elif self.hashed[i] is not None:
+                bucket = hash_value(X[i], self.hashed[i])
+                seen = any(bucket in self.inverse[d][i] for d in self.inverse)
+                prob *= self.get_inverse(i, X[i], c) if seen else 1
+            else:
+                prob *= self.get_inverse(i, X[i], c) if X[i] in self.get_unique_attribute_values(i) else 1
         return prob
 
     # return c with highest p(c|X) among all classes in C for given instance X
+    # scored by the compiled classifier, which remembers recent cases, so repeated cases are not
+    # scored again; get_posterior gives the same ranking one class at a time
     def classify(self, X):
-        C = self.get_classes()
-        maxC = None
-        maxProb = 0
-        
-        for c in C:
-            prob = self.get_posterior(X, c)
-            if prob > maxProb:
-                maxProb = prob
-                maxC = c
-            
-        return maxC
+        return self.get_compiled().classify(X)
+
+    # build a table holding the class of every possible case if there are at most limit of them,
+    # so classification becomes a single lookup, and return whether it was built
+    def precompute(self, limit=_decisionTableLimit):
+        return self.get_compiled().build_decision_table(limit)
+
+    # get compiled form of the model, compiling it on first use
+    def get_compiled(self):
+        if self.compiled is None:
+            self.compiled = compile_classifier(self)
+        return self.compiled
+
+    # return list of classifications for a matrix of cases, one case per row
+    def predict_batch(self, X):
+        return self.get_compiled().predict_batch(X)
+
+class CompiledClassifier:
+    # classification data converted into arrays for scoring many cases at once
+    # - every attribute value is encoded as an integer, with one extra code per
+    #   attribute for values not seen in training, which are ignored as in get_posterior
+    # - probabilities are stored as logarithms and summed, so long products
+    #   over wide datasets do not underflow
+    # - numeric attributes are scored with the log density of a normal distribution,
+    #   with missing values ignored
+
+    # classes[j] is class j, values[i][k] is the value of attribute i with code k,
+    # logInverse[i][k][j] is log p(x|c) for that value and class, and gaussians[i] holds the
+    # mean and variance of each class for numeric attribute i (NaN where unknown)
+    # for attributes hashed into hashed[i] buckets, values[i] are the buckets seen in training
+    def __init__(self, classes, logPrior, values, logInverse, gaussians=None, hashed=None):
+        self.classes = classes
+        self.logPrior = logPrior
+        self.codes = [{values[i][k] : k for k in range(len(values[i]))} for i in range(len(values))]
+        self.logInverse = logInverse
+        self.gaussians = gaussians or [None] * len(values)
+        self.hashed = hashed or [None] * len(values)
+
+        # -log(sqrt(2 pi variance)) and 1 / (2 variance) for the classes with known values
+        self.logNorm = []
+        self.scale = []
+        self.known = []
+        for gaussian in self.gaussians:
+            known = None if gaussian is None else ~np.isnan(gaussian[1])
+            self.known.append(known)
+            self.logNorm.append(None if gaussian is None else -0.5 * np.log(2 * np.pi * gaussian[1][known]))
+            self.scale.append(None if gaussian is None else 0.5 / gaussian[1][known])
+
+        # values of each attribute in sorted order along with their codes, for encoding by binary search
+        self.sortedValues = []
+        self.sortedCodes = []
+        for i in range(len(self.codes)):
+            values = sorted(self.codes[i])
+            self.sortedValues.append(np.array(values, dtype=str if self.hashed[i] is None else np.int64))
+            self.sortedCodes.append(np.array([self.codes[i][x] for x in values], dtype=np.intp))
+
+        # every value of the attributes counted by value numbered once, along with the code of each
+        # number for every attribute, the last entry being for values that are not numbered, so
+        # cases given as lists are looked up in a single pass with one dictionary
+        # missing values are numbered too, as they are never in a vocabulary but often in cases
+        self.valueIds = {"?" : 0}
+        for i in range(len(self.codes)):
+            if self.hashed[i] is None:
+                for x in self.codes[i]:
+                    self.valueIds.setdefault(x, len(self.valueIds))
+        self.idCodes = []
+        for i in range(len(self.codes)):
+            idCodes = np.full(len(self.valueIds) + 1, len(self.codes[i]), dtype=np.intp)
+            if self.hashed[i] is None:
+                idCodes[[self.valueIds[x] for x in self.codes[i]]] = list(self.codes[i].values())
+            self.idCodes.append(idCodes)
+
+        # index of the class of every encoded case, with one axis per attribute, if built
+        self.decisionTable = None
+
+        # single cases are looked up by their codes and numeric values in a bounded LRU cache
+        self.predict_key = functools.lru_cache(maxsize=_cacheSize)(self.score_key)
+        self.labels = self.classes + [None]
+
+    # the case cache belongs to this process, so it is rebuilt empty when sent to a worker
+    def __getstate__(self):
+        state = dict(self.__dict__)
+        del state["predict_key"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.predict_key = functools.lru_cache(maxsize=_cacheSize)(self.score_key)
+
+    # return the class for a single case X, with None as in predict_batch
+    def classify(self, X):
+        return self.labels[self.predict_key(self.get_key(X))]
+
+    # return the codes of a single case followed by its numeric values, None where missing
+    def get_key(self, X):
+        key = [self.codes[i].get(decode(X[i]) if self.hashed[i] is None else hash_value(X[i], self.hashed[i]),
+                                 len(self.codes[i]))
+               for i in range(len(self.codes))]
+        if self.has_numbers():
+            key += [to_number(X[i]) if self.gaussians[i] is not None else None for i in range(len(self.codes))]
+        return tuple(key)
+
+    # return index of the class of the case with the given key, or -1
+    # the terms are added in the same order as in get_scores, so the scores are the same
+    def score_key(self, key):
+        A = len(self.codes)
+        if self.decisionTable is not None:
+            return int(self.decisionTable[key[:A]])
+
+        scores = self.logPrior.copy()
+        for i in range(A):
+            scores += self.logInverse[i][key[i]]
+        for i in range(len(key) - A):
+            if self.gaussians[i] is not None and key[A + i] is not None:
+                scores[self.known[i]] += self.logNorm[i] - \
+                                         (key[A + i] - self.gaussians[i][0][self.known[i]]) ** 2 * self.scale[i]
+        best = int(np.argmax(scores))
+        return -1 if np.isneginf(scores[best]) else best
+
+    # return hits, misses and size of the case cache, and whether a decision table is used
+    def get_cache_stats(self):
+        info = self.predict_key.cache_info()
+        return {"hits" : info.hits,
+                "misses" : info.misses,
+                "size" : info.currsize,
+                "max_size" : info.maxsize,
+                "decision_table" : self.decisionTable is not None}
+
+    # build a table holding the class of every possible encoded case if there are at most
+    # limit of them and no numeric attributes, and return whether it was built
+    def build_decision_table(self, limit=_decisionTableLimit):
+        if self.decisionTable is not None:
+            return True
+        if self.has_numbers():
+            return False
+        # every value seen in training plus the code for unseen values
+        shape = tuple(len(codes) + 1 for codes in self.codes)
+        if math.prod(shape) > limit:
+            return False
+
+        table = np.empty(math.prod(shape), dtype=np.min_scalar_type(-len(self.classes)))
+        for start in range(0, len(table), _batchSize):
+            index = np.arange(start, min(start + _batchSize, len(table)))
+            encoded = np.asfortranarray(np.array(np.unravel_index(index, shape), dtype=np.intp).T)
+            table[start:start + len(index)] = self.predict_codes(encoded)
+        self.decisionTable = table.reshape(shape)
+        self.predict_key.cache_clear()
+        return True
+
+    # return integer codes for a matrix of cases as an array with one column per attribute
+    def encode(self, X):
+        if is_case_list(X):
+            return self.encode_cases(X)
+        columns = get_columns(X)
+        # column-major, since cases are scored one attribute column at a time
+        encoded = np.empty((len(columns[0]), len(self.codes)), dtype=np.intp, order="F")
+        for i in range(len(self.codes)):
+            encoded[:, i] = self.encode_column(i, np.ascontiguousarray(columns[i]))
+        return encoded
+
+    # return integer codes for cases given as a list of lists of values
+    # the values of all the cases are looked up in a single pass over them, since for strings
+    # that are still python objects that is faster than converting them into an array first,
+    # and only the values that are not found are decoded and looked up again, as in get_key
+    def encode_cases(self, X):
+        m = len(self.codes)
+        if any([len(case) != m for case in X]):
+            raise ValueError("expected {0} values in every case".format(m))
+        ids = np.fromiter(map(self.valueIds.get, itertools.chain.from_iterable(X), itertools.repeat(-1)),
+                          dtype=np.intp, count=len(X) * m).reshape(len(X), m)
+        encoded = np.empty((len(X), m), dtype=np.intp, order="F")
+        for i in range(m):
+            if self.hashed[i] is not None:
+                encoded[:, i] = self.encode_column(i, np.array([case[i] for case in X]))
+                continue
+            encoded[:, i] = self.idCodes[i][ids[:, i]]
+            if self.codes[i]:
+                for n in np.flatnonzero(ids[:, i] < 0):
+                    encoded[n, i] = self.codes[i].get(decode(X[n][i]), len(self.codes[i]))
+        return encoded
+
+    # return values of numeric attributes for a matrix of cases as an array with one column
+    # per attribute (NaN for missing values), or None if the model has no numeric attributes
+    def encode_numbers(self, X):
+        if not self.has_numbers():
+            return None
+        columns = get_columns(X)
+        numbers = np.full((len(columns[0]), len(self.codes)), np.nan)
+        for i in range(len(self.codes)):
+            if self.gaussians[i] is not None:
+                numbers[:, i] = to_numbers(columns[i])
+        return numbers
+
+    # return values of numeric attributes for the columns of a dataset, matched by position
+    def encode_dataset_numbers(self, dataset):
+        if not self.has_numbers():
+            return None
+        numbers = np.full((len(dataset), len(self.codes)), np.nan)
+        for i in range(len(self.codes)):
+            if self.gaussians[i] is not None:
+                if dataset.vocabularies[i] is None:
+                    numbers[:, i] = dataset.columns[i]
+                else:
+                    numbers[:, i] = to_numbers(dataset.vocabularies[i])[dataset.columns[i]]
+        return numbers
+
+    # return whether any attribute is scored by its numeric value
+    def has_numbers(self):
+        return any(gaussian is not None for gaussian in self.gaussians)
+
+    # return integer codes for every value in a single attribute column
+    def encode_column(self, i, column):
+        unseen = len(self.codes[i])
+        if unseen == 0:
+            return np.full(len(column), unseen, dtype=np.intp)
+
+        if self.hashed[i] is not None:
+            # hash each distinct value once
+            values, inverse = np.unique(column, return_inverse=True)
+            return self.encode_buckets(i, hash_values(values, self.hashed[i]))[inverse.reshape(-1)]
+
+        if column.dtype.kind in ("U", "S"):
+            # binary search for each value among the sorted attribute values
+            values = self.sortedValues[i]
+            if column.dtype.kind == "S":
+                values = np.char.encode(values, _encoding)
+            index = np.minimum(np.searchsorted(values, column), len(values) - 1)
+            return np.where(values[index] == column, self.sortedCodes[i][index], unseen)
+
+        # mixed columns are decoded one distinct value at a time
+        values, inverse = np.unique(column.astype(str), return_inverse=True)
+        lookup = np.array([self.codes[i].get(x, unseen) for x in values], dtype=np.intp)
+        return lookup[inverse.reshape(-1)]
+
+    # return integer codes for the attribute columns of a dataset, matched by position
+    def encode_dataset(self, dataset):
+        return self.encode_vocabulary_codes(dataset.vocabularies, dataset.columns, len(dataset))
+
+    # return index of every class value in a dataset, raising KeyError for unknown classes
+    def encode_dataset_classes(self, dataset):
+        return self.encode_class_codes(dataset.vocabularies[-1], dataset.columns[-1])
+
+    # return integer codes for the attribute columns of a chunk from an ArffReader
+    def encode_chunk(self, reader, chunk):
+        vocabularies = [None if reader.types[i] == _numeric else reader.values[i] for i in range(len(reader.types))]
+        return self.encode_vocabulary_codes(vocabularies, chunk.codes.T, len(chunk))
+
+    # return index of every class value in a chunk from an ArffReader, raising KeyError for unknown classes
+    def encode_chunk_classes(self, reader, chunk):
+        return self.encode_class_codes(reader.values[-1], chunk.codes[:, -1])
+
+    # return integer codes for n cases given as codes into vocabularies, one column per attribute
+    # with None as the vocabulary of numeric columns
+    def encode_vocabulary_codes(self, vocabularies, columns, n):
+        encoded = np.empty((n, len(self.codes)), dtype=np.intp, order="F")
+        for i in range(len(self.codes)):
+            unseen = len(self.codes[i])
+            if vocabularies[i] is None:
+                encoded[:, i] = unseen
+                continue
+            # the vocabulary is in its own order, so translate the codes with a lookup table
+            if self.hashed[i] is not None:
+                lookup = self.encode_buckets(i, hash_values(vocabularies[i], self.hashed[i]))
+            else:
+                lookup = np.array([self.codes[i].get(x, unseen) for x in vocabularies[i]], dtype=np.intp)
+            encoded[:, i] = lookup[columns[i]]
+        return encoded
+
+    # return integer codes for the buckets of hashed attribute i
+    def encode_buckets(self, i, buckets):
+        unseen = len(self.codes[i])
+        if unseen == 0:
+            return np.full(len(buckets), unseen, dtype=np.intp)
+        values = self.sortedValues[i]
+        index = np.minimum(np.searchsorted(values, buckets), len(values) - 1)
+        return np.where(values[index] == buckets, self.sortedCodes[i][index], unseen)
+
+    # return index of every class given as codes into a vocabulary, raising KeyError for unknown classes
+    def encode_class_codes(self, vocabulary, column):
+        index = {self.classes[j] : j for j in range(len(self.classes))}
+        lookup = np.array([index.get(c, -1) for c in vocabulary], dtype=np.intp)
+        classes = lookup[column]
+        if (classes < 0).any():
+            raise KeyError(vocabulary[column[np.argmin(classes)]])
+        return classes
+
+    # return log p(c) + sum of log p(x|c) for every encoded case and class,
+    # given the values of numeric attributes as returned by encode_numbers
+    def get_scores(self, encoded, numbers=None):
+        scores = np.tile(self.logPrior, (len(encoded), 1))
+        for i in range(len(self.logInverse)):
+            scores += np.take(self.logInverse[i], encoded[:, i], axis=0)
+        if numbers is not None:
+            for i in range(len(self.gaussians)):
+                if self.gaussians[i] is None:
+                    continue
+                x = numbers[:, i:i + 1]
+                logDensity = self.logNorm[i] - (x - self.gaussians[i][0][self.known[i]]) ** 2 * self.scale[i]
+                scores[:, self.known[i]] += np.where(np.isnan(x), 0.0, logDensity)
+        return scores
+
+    # return index of the class with highest posterior for every encoded case,
+    # or -1 where every class has a probability of 0
+    def predict_codes(self, encoded, numbers=None):
+        if self.decisionTable is not None:
+            return self.decisionTable[tuple(encoded.T)].astype(np.intp)
+
+        predicted = np.empty(len(encoded), dtype=np.intp)
+        for start in range(0, len(encoded), _batchSize):
+            scores = self.get_scores(encoded[start:start + _batchSize],
+                                     None if numbers is None else numbers[start:start + _batchSize])
+            best = np.argmax(scores, axis=1)
+            best[np.isneginf(scores[np.arange(len(scores)), best])] = -1
+            predicted[start:start + _batchSize] = best
+        return predicted
+
+    # return list of classifications for a matrix of cases, with None as in classify
+    # most of the time for string cases goes into looking their values up, so cases given as
+    # lists of strings are classified about 35 times faster than one at a time by get_posterior,
+    # an array of strings about 70 times, and only cases already encoded by encode, as when
+    # classifying the same cases again, are 100 times faster or more; bench.py measures all three
+    def predict_batch(self, X):
+        # index -1 picks the trailing None
+        labels = np.array(self.classes + [None], dtype=object)
+        return labels[self.predict_codes(self.encode(X), self.encode_numbers(X))].tolist()
+
+# estimate the accuracy of a classifier trained on dataset by k-fold cross-validation, or
+# leave-one-out if folds is None, returning the ConfusionMatrix of the held-out predictions
+# the model for each fold is the model of the whole dataset minus the counts of the fold,
+# and groups of folds are evaluated in parallel by a pool of worker processes, except for
+# leave-one-out, where every case is scored in a single pass by evaluate_leave_one_out
+# with hashBuckets, string and high-cardinality attributes are hashed as in Classifier.hashBuckets
+def cross_validate_dataset(dataset, folds=10, workers=None, seed=0, hashBuckets=0):
+    n = len(dataset)
+    folds = n if folds is None else folds
+    if folds < 2 or folds > n:
+        raise ValueError("number of folds must be between 2 and the number of instances")
+
+    full = Classifier()
+    full.hashBuckets = hashBuckets
+    full.get_from_dataset(dataset)
+    C = full.get_compiled().classes
+    if folds == n:
+        matrix = ConfusionMatrix()
+        matrix.set_counts(C, *evaluate_leave_one_out(full, dataset))
+        return matrix
+
+    # spread the instances over the folds in random order, and evaluate contiguous groups of folds
+    foldIds = np.random.default_rng(seed).permutation(n) % folds
+    workers = min(workers or os.cpu_count(), folds)
+    groups = np.array_split(np.arange(folds), workers)
+    tasks = [(full, dataset.get_subset(np.isin(foldIds, group)), foldIds[np.isin(foldIds, group)], group)
+             for group in groups]
+    if workers == 1:
+        results = [evaluate_folds(*task) for task in tasks]
+    else:
+        pool = get_pool(workers)
+        results = [future.result() for future in [pool.submit(evaluate_folds, *task) for task in tasks]]
+
+    matrix = ConfusionMatrix()
+    matrix.set_counts(C, sum([counts for counts, unclassified in results]),
+                      sum([unclassified for counts, unclassified in results]))
+    return matrix
+
+# classify the instances of each fold with the full model minus the counts of that fold,
+# run in a worker process, returning (counts of (actual, classified) pairs, number of unclassified cases)
+# with classes indexed as in the compiled full model
+def evaluate_folds(full, dataset, foldIds, folds):
+    C = full.get_compiled().classes
+    index = {C[j] : j for j in range(len(C))}
+    counts = np.zeros((len(C), len(C)), dtype=np.int64)
+    unclassified = 0
+
+    # sorting by fold lets each fold be taken as a slice
+    order = np.argsort(foldIds, kind="stable")
+    bounds = np.searchsorted(foldIds[order], np.append(folds, folds[-1] + 1))
+    for f in range(len(folds)):
+        held = dataset.get_subset(order[bounds[f]:bounds[f + 1]])
+        fold = Classifier()
+        fold.reset(full.types, full.labels, full.hashed)
+        fold.partial_fit(held)
+        model = full.copy()
+        model.subtract(fold)
+
+        compiled = model.get_compiled()
+        actual = full.get_compiled().encode_dataset_classes(held)
+        classified = compiled.predict_codes(compiled.encode_dataset(held), compiled.encode_dataset_numbers(held))
+        # the model of a fold may lack classes that only occur in the fold
+        classified = np.array([index[c] for c in compiled.classes] + [-1], dtype=np.intp)[classified]
+        unclassified += int((classified < 0).sum())
+        known = classified >= 0
+        counts += np.bincount(actual[known] * len(C) + classified[known],
+                              minlength=len(C) * len(C)).reshape(len(C), len(C))
+    return counts, unclassified
+
+# classify every instance of dataset with the full model minus the counts of that instance,
+# returning the same as evaluate_folds
+# removing a single case only lowers the counts of its own class and values by one, so every
+# case is scored at once from the counts of the full model, as the model of its fold would score it
+def evaluate_leave_one_out(full, dataset):
+    present, seen = full.get_order()
+    C = len(present)
+    # classes are indexed as in the compiled full model, in which every class of the dataset occurs
+    position = np.full(len(full.classVals), -1, dtype=np.intp)
+    position[present] = np.arange(C)
+    actual = position[get_codes(full.classVals, dataset.vocabularies[-1])[dataset.columns[-1]]]
+    classCounts = full.classCounts[present]
+    total = int(classCounts.sum())
+
+    # (counts by class and value, total of each value, value code of every case) for nominal
+    # attributes, and (moments, moments after removing no values, values) for numeric attributes
+    nominal = []
+    numeric = []
+    for i in range(len(full.types)):
+        if full.counts[i] is None:
+            moments = full.moments[i][:, present]
+            numeric.append((moments, remove_moments(moments, np.zeros_like(moments)),
+                            np.asarray(dataset.columns[i], dtype=float)))
+            continue
+        if full.hashed[i] is None:
+            table = full.counts[i][present]
+            codes = get_codes(full.values[i], dataset.vocabularies[i])[dataset.columns[i]]
+        else:
+            # hashed attributes are counted by bucket, so their sparse counts are spread over the seen buckets
+            buckets = np.array(seen[i], dtype=np.int64)
+            table = np.zeros((len(full.classVals), len(buckets)), dtype=np.int64)
+            table[full.counts[i][0], np.searchsorted(buckets, full.counts[i][1])] = full.counts[i][2]
+            table = table[present]
+            codes = np.searchsorted(buckets, hash_values(dataset.vocabularies[i], full.hashed[i]))[dataset.columns[i]]
+        nominal.append((table, table.sum(axis=0), codes))
+
+    counts = np.zeros((C, C), dtype=np.int64)
+    unclassified = 0
+    for start in range(0, len(dataset), _batchSize):
+        y = actual[start:start + _batchSize]
+        rows = np.arange(len(y))
+        own = np.zeros((len(y), C), dtype=np.int64)
+        own[rows, y] = 1
+        remaining = classCounts - own
+
+        # terms are added in the same order as in CompiledClassifier.get_scores
+        with np.errstate(divide="ignore", invalid="ignore"):
+            scores = np.log(remaining / (total - 1))
+            for table, totals, codes in nominal:
+                code = codes[start:start + _batchSize]
+                # values that only occur in the case itself are unseen and ignored
+                scores += np.where((totals[code] > 1)[:, None], np.log((table[:, code].T - own) / remaining), 0.0)
+
+            for moments, others, values in numeric:
+                x = values[start:start + _batchSize]
+                n = np.tile(others[0], (len(y), 1))
+                mean = np.tile(others[1], (len(y), 1))
+                M2 = np.tile(others[2], (len(y), 1))
+                # remove the value of the case from the moments of its class, as remove_moments does
+                known = ~np.isnan(x)
+                a = moments[:, y[known]]
+                b = x[known]
+                n[rows[known], y[known]] = a[0] - 1
+                mean[rows[known], y[known]] = np.where(a[0] > 1, (a[0] * a[1] - 1.0 * b) / (a[0] - 1), 0.0)
+                delta = b - mean[rows[known], y[known]]
+                M2[rows[known], y[known]] = np.where(a[0] > 1, np.maximum(a[2] - 0.0 - delta ** 2 * (a[0] - 1) * (1.0 / a[0]), 0.0), 0.0)
+
+                # smoothed variances as in Classifier.get_gaussians, for each case
+                hasValues = n > 0
+                variance = np.where(hasValues, M2 / np.where(hasValues, n, 1.0), np.nan)
+                largest = np.where(hasValues, variance, 0.0).max(axis=1, keepdims=True)
+                variance += np.where(largest > 0, _varianceSmoothing * largest, _varianceSmoothing)
+                logDensity = -0.5 * np.log(2 * np.pi * variance) - (x[:, None] - mean) ** 2 * (0.5 / variance)
+                scores += np.where(hasValues & known[:, None], logDensity, 0.0)
+
+        # classes with no other cases are not in the model of the fold
+        scores[remaining == 0] = -np.inf
+        classified = np.argmax(scores, axis=1)
+        classified[np.isneginf(scores[rows, classified])] = -1
+        unclassified += int((classified < 0).sum())
+        known = classified >= 0
+        counts += np.bincount(y[known] * C + classified[known], minlength=C * C).reshape(C, C)
+    return counts, unclassified
+
+# process pool shared by all parallel training
+_pool = None
+_poolWorkers = None
+
+def get_pool(workers):
+    global _pool, _poolWorkers
+    if _pool is None or _poolWorkers != workers:
+        if _pool is not None:
+            _pool.shutdown()
+        _pool = ProcessPoolExecutor(max_workers=workers)
+        _poolWorkers = workers
+    return _pool
+
+# run function on the arguments of every task, in a pool of worker processes unless pool is None,
+# returning the results in the order of the tasks
+def run_tasks(pool, function, tasks):
+    if pool is None:
+        return [function(*task) for task in tasks]
+    return [future.result() for future in [pool.submit(function, *task) for task in tasks]]
+
+# count the cases in the byte range [start, end) of an .arff file, run in a worker process
+# returns the classifier and, if there are numeric attributes, a (count, moments, classCodes, numbers)
+# piece for every chunk, read in the chunks of a serial reader given the index firstRow of the first
+# row in the range: whole chunks only keep the moments of each attribute, and chunks cut short by the
+# range keep their class codes and values, to be joined with the rest of the chunk from the next range
+def count_shard(filename, chunkSize, start, end, hashed=None, firstRow=0):
+    reader = ArffReader(filename, chunkSize)
+    classifier = Classifier()
+    classifier.reset(reader.attributeTypes, reader.attributeNames, hashed)
+    pieces = []
+    for chunk in reader.read_range(start, end, firstRow):
+        classifier.partial_fit(chunk, reader)
+        if chunk.numbers is None:
+            continue
+        classCodes = get_codes(classifier.classVals, reader.values[-1])[chunk.codes[:, -1]]
+        if len(chunk) == chunkSize:
+            pieces.append((len(chunk), [None if moments is None else
+                                        get_moments(classCodes, chunk.numbers[:, i], len(classifier.classVals))
+                                        for i, moments in enumerate(classifier.moments)], None, None))
+        else:
+            pieces.append((len(chunk), None, classCodes, chunk.numbers))
+    return classifier, pieces
+
+# count the data rows in the byte range [start, end) of an .arff file, run in a worker process
+def count_rows(filename, start, end):
+    return ArffReader(filename).count_rows(start, end)
+
+# convert a classifier into arrays of log probabilities for batch prediction
+def compile_classifier(classifier):
+    if classifier.classCounts is None:
+        # models loaded without counts are compiled from their probabilities
+        classes = classifier.get_classes()
+        values = [[] if classifier.types[i] == _numeric else classifier.get_unique_attribute_values(i)
+                  for i in range(len(classifier.types))]
+        logInverse = []
+        with np.errstate(divide="ignore"):
+            logPrior = np.log(np.array([classifier.get_prior(c) for c in classes]))
+            for i in range(len(values)):
+                table = np.zeros((len(values[i]) + 1, len(classes)))
+                for j in range(len(classes)):
+                    table[:len(values[i]), j] = np.log([classifier.get_inverse(i, x, classes[j])
+                                                        for x in values[i]])
+                logInverse.append(table)
+        return CompiledClassifier(classes, logPrior, values, logInverse)
+
+    # otherwise straight from the counts, without building the probability dictionaries
+    present, seen = classifier.get_order()
+    classCounts = classifier.classCounts[present]
+    values = []
+    logInverse = []
+    with np.errstate(divide="ignore"):
+        logPrior = np.log(classCounts / classCounts.sum())
+        for i in range(len(seen)):
+            if seen[i] is None:
+                values.append([])
+                logInverse.append(np.zeros((1, len(present))))
+                continue
+            if classifier.hashed[i] is not None:
+                values.append(seen[i])
+                logInverse.append(compile_sparse_counts(classifier.counts[i], seen[i], present, classCounts,
+                                                        len(classifier.classVals)))
+                continue
+            values.append([classifier.values[i][k] for k in seen[i]])
+            table = np.zeros((len(seen[i]) + 1, len(present)))
+            table[:len(seen[i])] = np.log(classifier.counts[i][present][:, seen[i]].T / classCounts)
+            logInverse.append(table)
+    gaussians = [None if table is None else np.ascontiguousarray(table[:, present])
+                 for table in classifier.get_gaussians()]
+    return CompiledClassifier([classifier.classVals[j] for j in present], logPrior, values, logInverse,
+                              gaussians, classifier.hashed)
+
+# return log p(x|c) for the seen buckets of a hashed attribute and the present classes, given its
+# sparse counts over C classes, in the layout of the compiled tables of attributes counted by value
+def compile_sparse_counts(table, buckets, present, classCounts, C):
+    columns = np.full(C, -1, dtype=np.intp)
+    columns[present] = np.arange(len(present))
+    logInverse = np.zeros((len(buckets) + 1, len(present)))
+    logInverse[:len(buckets)] = -np.inf
+    known = columns[table[0]] >= 0
+    rows = np.searchsorted(buckets, table[1][known])
+    logInverse[rows, columns[table[0][known]]] = np.log(table[2][known] / classCounts[columns[table[0][known]]])
+    return logInverse
+
+# return codes of values in a vocabulary list, appending the values that are not in it yet
+# index maps every value of the vocabulary to its code and is extended with the values appended
+def add_to_vocabulary(vocabulary, values, index):
+    codes = np.empty(len(values), dtype=np.intp)
+    for k in range(len(values)):
+        if values[k] not in index:
+            index[values[k]] = len(vocabulary)
+            vocabulary.append(values[k])
+        codes[k] = index[values[k]]
+    return codes
+
+# return sparse counts with count[n] cases (1 if counts is None) of class classCodes[n] in bucket
+# buckets[n] added to the columns (class, bucket, count) of table, dropping counts that become 0
+def add_sparse_counts(table, classCodes, buckets, counts=None):
+    keys = np.concatenate([table[0] << 32 | table[1],
+                           np.asarray(classCodes, dtype=np.int64) << 32 | np.asarray(buckets, dtype=np.int64)])
+    keys, inverse = np.unique(keys, return_inverse=True)
+    totals = np.zeros(len(keys), dtype=np.int64)
+    np.add.at(totals, inverse.reshape(-1),
+              np.concatenate([table[2], np.ones(len(buckets), dtype=np.int64) if counts is None else counts]))
+    keys = keys[totals != 0]
+    return np.array([keys >> 32, keys & 0xFFFFFFFF, totals[totals != 0]], dtype=np.int64).reshape(3, -1)
+
+# return the bucket of every value when hashed into size buckets, the same in every process
+def hash_values(values, size):
+    return np.array([hash_value(x, size) for x in values], dtype=np.int64)
+
+def hash_value(x, size):
+    return zlib.crc32(decode(x).encode("utf-8")) % size
+
+# return the narrowest unsigned integer type holding the codes of a vocabulary of the given size
+def get_code_type(size):
+    return np.min_scalar_type(max(size - 1, 0))
+
+# return codes of values in a vocabulary list, raising ValueError for values that are not in it
+def get_codes(vocabulary, values):
+    index = {vocabulary[k] : k for k in range(len(vocabulary))}
+    try:
+        return np.array([index[x] for x in values], dtype=np.intp)
+    except KeyError as e:
+        raise ValueError("unknown value " + str(e))
+
+# return empty moments for C classes for each numeric attribute, and None for nominal attributes
+def get_empty_moments(types, C):
+    return [np.zeros((3, C)) if types[i] == _numeric else None for i in range(len(types))]
+
+# return the number of known values, their mean and sum of squared differences from the mean
+# for each of C classes, given the class of every case and its value (NaN if missing)
+def get_moments(classCodes, column, C):
+    known = ~np.isnan(column)
+    classCodes = classCodes[known]
+    column = column[known]
+    n = np.bincount(classCodes, minlength=C).astype(float)
+    mean = np.zeros(C)
+    np.divide(np.bincount(classCodes, weights=column, minlength=C), n, out=mean, where=n > 0)
+    M2 = np.bincount(classCodes, weights=(column - mean[classCodes]) ** 2, minlength=C)
+    return np.array([n, mean, M2])
+
+# combine the moments of two sets of values, as in the parallel form of Welford's method
+def combine_moments(a, b):
+    n = a[0] + b[0]
+    delta = b[1] - a[1]
+    ratio = np.zeros(len(n))
+    np.divide(b[0], n, out=ratio, where=n > 0)
+    return np.array([n, a[1] + delta * ratio, a[2] + b[2] + delta ** 2 * a[0] * ratio])
+
+# remove the moments b of a subset of values from the moments a of all of them
+def remove_moments(a, b):
+    n = a[0] - b[0]
+    mean = np.zeros(len(n))
+    np.divide(a[0] * a[1] - b[0] * b[1], n, out=mean, where=n > 0)
+    delta = b[1] - mean
+    ratio = np.zeros(len(n))
+    np.divide(b[0], a[0], out=ratio, where=a[0] > 0)
+    M2 = np.maximum(a[2] - b[2] - delta ** 2 * n * ratio, 0.0)
+    return np.array([n, mean, np.where(n > 0, M2, 0.0)])
+
+# return an array of counts padded with zeros up to the given shape, as a view of a buffer that
+# is reused while it is large enough and otherwise reallocated with twice the size along every
+# dimension that grows, so growing a table a few rows or columns at a time takes amortised
+# time proportional to what is added
+def grow(counts, shape):
+    shape = tuple(shape)
+    if counts.shape == shape and counts.flags.writeable:
+        return counts
+    buffer = counts.base
+    if isinstance(buffer, np.ndarray) and buffer.ndim == counts.ndim and buffer.flags.writeable and \
+       buffer.ctypes.data == counts.ctypes.data and buffer.strides == counts.strides and \
+       all([shape[d] <= buffer.shape[d] for d in range(len(shape))]):
+        return buffer[tuple([slice(0, n) for n in shape])]
+    buffer = np.zeros([n if n == m else max(n, 2 * m) for n, m in zip(shape, counts.shape)], dtype=counts.dtype)
+    buffer[tuple([slice(0, n) for n in counts.shape])] = counts
+    return buffer[tuple([slice(0, n) for n in shape])]
+
+# convert a single value into a float, or None if it is missing or not a number
+def to_number(x):
+    try:
+        x = float(x.decode(_encoding) if isinstance(x, bytes) else x)
+    except (TypeError, ValueError):
+        return None
+    return None if math.isnan(x) else x
+
+# convert a column of values into floats, with NaN for missing values and values that are not numbers
+def to_numbers(column):
+    column = np.asarray(column)
+    if column.dtype.kind in ("f", "i", "u", "b"):
+        return column.astype(float)
+    values, inverse = np.unique(column.astype(str), return_inverse=True)
+    lookup = np.array([np.nan if to_number(x) is None else to_number(x) for x in values])
+    return lookup[inverse.reshape(-1)]
+
+# return whether X is a list of cases, each a list or tuple of values, rather than an array
+def is_case_list(X):
+    return not isinstance(X, np.ndarray) and len(X) > 0 and isinstance(X[0], (list, tuple))
+
+# return the attribute columns of a matrix of cases, or of a single case, as the columns of
+# an array, or as tuples of the values themselves for cases given as lists
+def get_columns(X):
+    if is_case_list(X):
+        return list(zip(*X))
+    X = np.asarray(X)
+    if X.ndim == 1:
+        X = X.reshape(1, -1)
+    return [X[:, i] for i in range(X.shape[1])]
+
+# convert a single value from the dataset into a string
+def decode(x):
+    return x.decode(_encoding) if isinstance(x, bytes) else str(x)
 
 class ConfusionMatrix:
     # matrix is 2d table in which cell (x, y) measures how many items in the
@@ -159,23 +1462,64 @@ class ConfusionMatrix:
     matrix = {}
     accuracy = 0
 
-    # create matrix
-    def __init__(self, dataset, classifier):
-        # get structure 
-        self.matrix = {c1 : {c2 : 0 for c2 in classifier.get_classes()}
-                       for c1 in classifier.get_classes()}
+    # per-class precision, recall and F1 score
+    precision = {}
+    recall = {}
+    f1 = {}
 
-        # fill values and calculate accuracy
-        
-        for i in range(len(dataset.instances)):
-            actual = dataset.instances[dataset.className][i].decode(_encoding)
-            classified = classifier.classify([x.decode(_encoding) for x in dataset.instances[i]])
-            
-            self.matrix[actual][classified] += 1
-            self.accuracy += 1 if actual == classified else 0
+    # number of cases that could not be classified, only counted in cross-validation
+    unclassified = 0
 
-        self.accuracy /= len(dataset.instances)
-        
+    # create matrix from a Dataset, or from an ArffReader one chunk at a time
+    # without a dataset, the matrix is left empty to be filled by set_counts
+    def __init__(self, dataset=None, classifier=None):
+        if dataset is None:
+            return
+
+        # classify every instance at once and count (actual, classified) pairs
+        compiled = classifier.get_compiled()
+        C = compiled.classes
+        if isinstance(dataset, ArffReader):
+            batches = ((compiled.encode_chunk_classes(dataset, chunk), compiled.encode_chunk(dataset, chunk),
+                        chunk.numbers)
+                       for chunk in dataset)
+        else:
+            batches = [(compiled.encode_dataset_classes(dataset),
+                        compiled.encode_dataset(dataset), compiled.encode_dataset_numbers(dataset))]
+
+        counts = np.zeros((len(C), len(C)), dtype=np.int64)
+        for actual, encoded, numbers in batches:
+            classified = compiled.predict_codes(encoded, numbers)
+            if (classified < 0).any():
+                # no class has a nonzero probability, so the case has no cell in the matrix
+                raise KeyError(None)
+            counts += np.bincount(actual * len(C) + classified,
+                                  minlength=len(C) * len(C)).reshape(len(C), len(C))
+        self.set_counts(C, counts)
+
+    # fill the matrix from the number of cases of class C[j1] classified as C[j2], counts[j1][j2],
+    # and the number of cases that could not be classified
+    def set_counts(self, C, counts, unclassified=0):
+        # get structure and fill values
+        self.matrix = {C[j1] : {C[j2] : int(counts[j1][j2]) for j2 in range(len(C))}
+                       for j1 in range(len(C))}
+        self.unclassified = unclassified
+
+        # calculate accuracy and per-class metrics
+        self.accuracy = int(np.trace(counts)) / (int(counts.sum()) + unclassified)
+
+        actualTotals = counts.sum(axis=1)
+        classifiedTotals = counts.sum(axis=0)
+        self.precision = {}
+        self.recall = {}
+        self.f1 = {}
+        for j in range(len(C)):
+            correct = int(counts[j][j])
+            self.precision[C[j]] = correct / int(classifiedTotals[j]) if classifiedTotals[j] else 0.0
+            self.recall[C[j]] = correct / int(actualTotals[j]) if actualTotals[j] else 0.0
+            self.f1[C[j]] = (2 * self.precision[C[j]] * self.recall[C[j]] /
+                             (self.precision[C[j]] + self.recall[C[j]])
+                             if self.precision[C[j]] + self.recall[C[j]] else 0.0)
 
     # display and format contents of matrix
     def print(self):
@@ -185,6 +1529,13 @@ class ConfusionMatrix:
          for c1 in self.matrix]
         return
 
+    # display precision, recall and F1 score of each class
+    def print_metrics(self):
+        [print("{0} : precision {1:.4f}, recall {2:.4f}, F1 {3:.4f}".format(
+            c, self.precision[c], self.recall[c], self.f1[c]))
+         for c in self.matrix]
+        return
+
 # classification info stored in local memory
 _dataset = Dataset()
 _classifier = Classifier()
@@ -195,7 +1546,8 @@ def menu():
         print("\n(1) Generate New Classifier")
         print("(2) Load and Test Classifier")
         print("(3) Classify New Cases")
-        print("(4) Quit")
+        print("(4) Cross-Validate Classifier")
+        print("(5) Quit")
 
         choice = input("Select An Option: ")
 
@@ -206,6 +1558,8 @@ def menu():
         elif choice == "3":
             test_new_cases()
         elif choice == "4":
+            cross_validate()
+        elif choice == "5":
             return
         else:
             print("Invalid Selection. Please Try Again.")
@@ -233,8 +1587,8 @@ def learn_classifier():
 
     # 4)
     print("Saving classifier...")
-    classifierFile = dataFile.replace(".arff", ".json")
-    _classifier.write_to_file(classifierFile)
+    classifierFile = dataFile.replace(".arff", ".bin")
+    _classifier.write_to_binary(classifierFile)
     print("Classifier information saved to " + classifierFile)
         
     return
@@ -248,8 +1602,8 @@ def load_and_test():
 
     # 1)
     global _classifier
-    classifierFile = input("\nEnter the name of the classifier file (.json) to load, or leave the field empty to use the existing classifier: ")
-    if _classifier.get_from_file(classifierFile):
+    classifierFile = input("\nEnter the name of the classifier file (.bin) to load, or leave the field empty to use the existing classifier: ")
+    if _classifier.get_from_binary(classifierFile) or _classifier.get_from_file(classifierFile):
         print("Classifier loaded from file " + classifierFile)
     elif classifierFile == "":
         print("Blank input. Using currently loaded classification model...")
@@ -270,7 +1624,7 @@ def load_and_test():
     else:
         print("Input file invalid or not found. Using currently loaded dataset..")
 
-    if len(_dataset.instances) == 0:
+    if len(_dataset) == 0:
         print("[RuntimeError] Dataset appears to contain no data")
         return
 
@@ -283,6 +1637,8 @@ def load_and_test():
         print("\nConfusion Matrix:")
         _confusionMatrix.print()
         print("Accuracy: {0}%".format(_confusionMatrix.accuracy * 100))
+        print("\nPer-Class Metrics:")
+        _confusionMatrix.print_metrics()
         
     except ZeroDivisionError:
         print("[ZeroDivisionError] Attempting to work with empty dataset")
@@ -307,8 +1663,8 @@ def test_new_cases():
 
     # 1)
     global _classifier
-    classifierFile = input("\nEnter the name of the classifier file (.json) to load, or leave the field empty to use the existing classifier: ")
-    if _classifier.get_from_file(classifierFile):
+    classifierFile = input("\nEnter the name of the classifier file (.bin) to load, or leave the field empty to use the existing classifier: ")
+    if _classifier.get_from_binary(classifierFile) or _classifier.get_from_file(classifierFile):
         print("Classifier loaded from file " + classifierFile)
     elif classifierFile == "":
         print("Blank input. Using currently loaded classification model...")
@@ -377,6 +1733,49 @@ def test_new_cases():
     
     return
 
+# fourth menu option
+def cross_validate():
+    # 1) get user input for name of .arff file containing the dataset, retrieve contents
+    # 2) get user input for number of folds
+    # 3) estimate accuracy of a classifier for the dataset by cross-validation
+    # 4) print confusion matrix of the held-out predictions
+
+    # 1)
+    datasetFile = input("\nEnter the name of the dataset file (.arff) to load, or leave the field empty to use the existing dataset: ")
+    if _dataset.get_from_arff(datasetFile):
+        print("Dataset loaded from file " + datasetFile)
+    elif datasetFile == "":
+        print("Blank input. Using currently loaded dataset...")
+    else:
+        print("Input file invalid or not found. Using currently loaded dataset..")
+
+    if len(_dataset) == 0:
+        print("[RuntimeError] Dataset appears to contain no data")
+        return
+
+    # 2)
+    choice = input("Enter the number of folds, L for leave-one-out, or leave the field empty for 10 folds: ")
+    try:
+        folds = None if choice.lower() == "l" else int(choice) if choice else 10
+
+        # 3)
+        print("\nCross-validating...")
+        _confusionMatrix = cross_validate_dataset(_dataset, folds)
+
+        # 4)
+        print("\nConfusion Matrix:")
+        _confusionMatrix.print()
+        print("Accuracy: {0}%".format(_confusionMatrix.accuracy * 100))
+        if _confusionMatrix.unclassified:
+            print("Cases with a probability of 0 for every class: {0}".format(_confusionMatrix.unclassified))
+        print("\nPer-Class Metrics:")
+        _confusionMatrix.print_metrics()
+
+    except ValueError:
+        print("[ValueError] Number of folds must be between 2 and the number of instances")
+
+    return
+
 # driver function
 def py_nb():
     menu()
@@ -0,0 +1,346 @@
+# Classification service for models generated by p2_7194.py
+#
+# The model is loaded once and kept in memory. Cases arriving at the same time,
+# from any number of connections, are grouped into micro-batches and scored
+# together by the compiled classifier. Sending RELOAD, or SIGHUP to the process,
+# loads a model file and swaps it in. Requests already in a batch finish on the
+# old model, and everything after uses the new one, so no request is dropped.
+#
+# The protocol is line based. Requests from the client:
+#     CASE <values>         classify one case, values separated by commas as in an .arff file
+#     BULK <count>          classify the next count lines, one case per line
+#     RELOAD [file]         load the model file again, or load a different one
+#     STATS                 show request, latency and throughput counters
+#     QUIT                  close the session
+# Responses from the server, one line each:
+#     CLASS <class>         classification of a case, None if no class has a nonzero probability,
+#                           one line per case in the order the cases were sent
+#     STATS <json>          counters
+#     OK [...]              request accepted
+#     ERR <message>         request rejected
+#
+# usage: python service.py model.bin --port 8766 or python service.py model.bin --unix /tmp/nb.sock
+
+import argparse
+import asyncio
+import collections
+import json
+import signal
+import time
+
+import p2_7194 as nb
+from arff_reader import split_values
+
+# longest wait for more cases before a batch is scored, and largest batch
+_maxDelay = 0.002
+_maxBatch = 4096
+
+_maxLine = 65536
+_maxBulk = 100000
+
+# returned by Session.read_line for a line longer than _maxLine, which has been skipped
+_lineTooLong = object()
+
+# number of recent requests kept for latency percentiles
+_latencyWindow = 10000
+
+# load a model from a binary or exported .json file, returning None if it cannot be loaded
+# if the model has at most decisionTableLimit possible cases, the class of each is computed up front
+def load_model(filename, decisionTableLimit=nb._decisionTableLimit):
+    classifier = nb.Classifier()
+    if not (classifier.get_from_binary(filename) or classifier.get_from_file(filename)):
+        return None
+    if len(classifier.get_classes()) == 0:
+        return None
+    # compile before the model is swapped in, so the first batch does not pay for it
+    classifier.get_compiled()
+    if decisionTableLimit:
+        classifier.precompute(decisionTableLimit)
+    return classifier
+
+# nearest-rank percentile of values, which must be sorted
+def get_percentile(values, p):
+    return values[max(0, -(-p * len(values) // 100) - 1)] if values else 0.0
+
+class Batcher:
+    # collects the cases of concurrent requests and scores them together
+
+    def __init__(self, service, maxDelay=_maxDelay, maxBatch=_maxBatch):
+        self.service = service
+        self.maxDelay = maxDelay
+        self.maxBatch = maxBatch
+        # (cases, future) for every request waiting for the next batch
+        self.pending = []
+        self.pendingCases = 0
+        self.timer = None
+
+    # return the classification of every case, once the batch holding them has been scored
+    async def classify(self, cases):
+        future = asyncio.get_running_loop().create_future()
+        self.pending.append((cases, future))
+        self.pendingCases += len(cases)
+        if self.pendingCases >= self.maxBatch:
+            self.flush()
+        elif self.timer is None:
+            self.timer = asyncio.get_running_loop().call_later(self.maxDelay, self.flush)
+        return await future
+
+    def flush(self):
+        if self.timer is not None:
+            self.timer.cancel()
+            self.timer = None
+        if not self.pending:
+            return
+        batch = self.pending
+        self.pending = []
+        self.pendingCases = 0
+        asyncio.get_running_loop().create_task(self.score(batch))
+
+    async def score(self, batch):
+        # the model is taken once, so a reload during scoring does not mix two models in a batch
+        model = self.service.model
+        cases = [case for (requestCases, future) in batch for case in requestCases]
+        try:
+            # scoring runs in a thread so the event loop keeps accepting requests
+            classes = await asyncio.get_running_loop().run_in_executor(None, model.predict_batch, cases)
+        except Exception as e:
+            [future.set_exception(e) for (requestCases, future) in batch if not future.done()]
+            return
+
+        self.service.batches += 1
+        start = 0
+        for (requestCases, future) in batch:
+            if not future.done():
+                future.set_result(classes[start:start + len(requestCases)])
+            start += len(requestCases)
+
+class Session:
+    # state of a single client connection
+
+    def __init__(self, service, reader, writer):
+        self.service = service
+        self.reader = reader
+        self.writer = writer
+
+    async def send(self, line):
+        self.writer.write((line + "\n").encode())
+        await self.writer.drain()
+
+    # return the next line, b"" at the end of the stream, or _lineTooLong for a line longer
+    # than _maxLine
+    # the stream is opened with the same limit, so a longer line is never read whole, and
+    # everything up to and including its newline is skipped, so the rest of it is not read
+    # as the next line
+    async def read_line(self):
+        try:
+            line = await self.reader.readuntil(b"\n")
+        except asyncio.IncompleteReadError as e:
+            return e.partial
+        except asyncio.LimitOverrunError as e:
+            await self.skip_line(e.consumed)
+            return _lineTooLong
+        return _lineTooLong if len(line) > _maxLine else line
+
+    # discard count buffered bytes and the rest of the line they belong to
+    async def skip_line(self, count):
+        while True:
+            await self.reader.readexactly(count)
+            try:
+                await self.reader.readuntil(b"\n")
+                return
+            except asyncio.LimitOverrunError as e:
+                count = e.consumed
+
+    async def run(self):
+        try:
+            while True:
+                line = await self.read_line()
+                if not line:
+                    return
+                if line is _lineTooLong:
+                    await self.send("ERR line too long")
+                    continue
+                start = time.perf_counter()
+                words = line.decode(errors="replace").strip().split(None, 1)
+                if not words:
+                    continue
+                command = words[0].upper()
+                if command == "QUIT":
+                    await self.send("OK bye")
+                    return
+                handler = self.service.handlers.get(command)
+                if handler is None:
+                    await self.send("ERR unknown command " + words[0])
+                else:
+                    await handler(self, words[1] if len(words) > 1 else "")
+                self.service.record(time.perf_counter() - start)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self.service.sessions.discard(self)
+            self.writer.close()
+
+    # return the values of a case, or None if it does not have one value per attribute
+    def parse_case(self, line):
+        try:
+            case = split_values(line.strip())
+        except SyntaxError:
+            return None
+        return case if len(case) == len(self.service.model.labels) else None
+
+    async def classify(self, cases):
+        classes = await self.service.batcher.classify(cases)
+        self.service.cases += len(cases)
+        for c in classes:
+            self.writer.write(("CLASS " + str(c) + "\n").encode())
+        await self.writer.drain()
+
+    async def handle_case(self, args):
+        case = self.parse_case(args)
+        if case is None:
+            await self.send("ERR expected {0} values".format(len(self.service.model.labels)))
+            return
+        await self.classify([case])
+
+    async def handle_bulk(self, args):
+        try:
+            count = int(args)
+        except ValueError:
+            count = -1
+        if count not in range(1, _maxBulk + 1):
+            await self.send("ERR usage: BULK <count>, with count from 1 to " + str(_maxBulk))
+            return
+
+        # read every case before answering, so the whole request goes into one batch
+        # all count lines are read even if some are invalid, so none is taken for a command
+        cases = []
+        invalid = None
+        for i in range(count):
+            line = await self.read_line()
+            if not line:
+                return
+            if line is _lineTooLong:
+                case = None
+                error = "line too long"
+            else:
+                case = self.parse_case(line.decode(errors="replace"))
+                error = "expected {0} values".format(len(self.service.model.labels))
+            if case is None and invalid is None:
+                invalid = "ERR case {0}: {1}".format(i + 1, error)
+            cases.append(case)
+        if invalid is not None:
+            await self.send(invalid)
+            return
+        await self.classify(cases)
+
+    async def handle_reload(self, args):
+        filename = args.strip() or self.service.modelFile
+        if await self.service.reload(filename):
+            await self.send("OK reloaded " + filename)
+        else:
+            await self.send("ERR model file invalid or not found: " + filename)
+
+    async def handle_stats(self, args):
+        await self.send("STATS " + json.dumps(self.service.get_stats()))
+
+class ClassificationService:
+
+    def __init__(self, model, modelFile, decisionTableLimit=nb._decisionTableLimit):
+        self.model = model
+        self.modelFile = modelFile
+        self.decisionTableLimit = decisionTableLimit
+        self.batcher = Batcher(self)
+        self.sessions = set()
+        self.handlers = {
+            "CASE": Session.handle_case,
+            "BULK": Session.handle_bulk,
+            "RELOAD": Session.handle_reload,
+            "STATS": Session.handle_stats,
+            }
+
+        # counters
+        self.started = time.perf_counter()
+        self.requests = 0
+        self.cases = 0
+        self.batches = 0
+        self.reloads = 0
+        self.latencies = collections.deque(maxlen=_latencyWindow)
+
+    def record(self, latency):
+        self.requests += 1
+        self.latencies.append(latency)
+
+    def get_stats(self):
+        uptime = time.perf_counter() - self.started
+        latencies = sorted(self.latencies)
+        return {
+            "model": self.modelFile,
+            "uptime_seconds": uptime,
+            "requests": self.requests,
+            "cases": self.cases,
+            "batches": self.batches,
+            "reloads": self.reloads,
+            "mean_batch_cases": self.cases / self.batches if self.batches else 0.0,
+            "requests_per_second": self.requests / uptime if uptime else 0.0,
+            "cases_per_second": self.cases / uptime if uptime else 0.0,
+            "latency_ms": {"p" + str(p) : get_percentile(latencies, p) * 1e3 for p in (50, 90, 99, 100)},
+            "model_cache": self.model.get_compiled().get_cache_stats(),
+            }
+
+    # load a model file in a thread and swap it in, returning whether it could be loaded
+    async def reload(self, filename):
+        model = await asyncio.get_running_loop().run_in_executor(None, load_model, filename,
+                                                                 self.decisionTableLimit)
+        if model is None:
+            return False
+        self.model = model
+        self.modelFile = filename
+        self.reloads += 1
+        return True
+
+    async def handle_connection(self, reader, writer):
+        session = Session(self, reader, writer)
+        self.sessions.add(session)
+        await session.run()
+
+    async def serve(self, host="127.0.0.1", port=8766, path=None):
+        loop = asyncio.get_running_loop()
+        try:
+            loop.add_signal_handler(signal.SIGHUP, lambda : loop.create_task(self.reload(self.modelFile)))
+        except (AttributeError, NotImplementedError):
+            # no SIGHUP on this platform, RELOAD still works
+            pass
+        if path:
+            server = await asyncio.start_unix_server(self.handle_connection, path=path, limit=_maxLine)
+        else:
+            server = await asyncio.start_server(self.handle_connection, host, port, limit=_maxLine)
+        async with server:
+            await server.serve_forever()
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve classifications from a naive Bayes model")
+    parser.add_argument("model", help="model file (.bin, or an exported .json)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--unix", help="listen on a unix socket at this path instead of TCP")
+    parser.add_argument("--max-delay", type=float, default=_maxDelay,
+                        help="longest wait in seconds for more cases before a batch is scored")
+    parser.add_argument("--max-batch", type=int, default=_maxBatch)
+    parser.add_argument("--decision-table-limit", type=int, default=nb._decisionTableLimit,
+                        help="precompute the class of every possible case if there are at most this many, 0 to never")
+    args = parser.parse_args()
+
+    model = load_model(args.model, args.decision_table_limit)
+    if model is None:
+        parser.error("model file invalid or not found: " + args.model)
+
+    service = ClassificationService(model, args.model, args.decision_table_limit)
+    service.batcher.maxDelay = args.max_delay
+    service.batcher.maxBatch = args.max_batch
+    try:
+        asyncio.run(service.serve(args.host, args.port, args.unix))
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
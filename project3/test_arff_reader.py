@@ -0,0 +1,51 @@
+import numpy as np
+import pytest
+
+import arff_reader
+from arff_reader import ArffReader
+
+def read_all(chunks):
+    chunks = list(chunks)
+    return (np.concatenate([chunk.codes for chunk in chunks]),
+            np.concatenate([chunk.numbers for chunk in chunks]), [len(chunk) for chunk in chunks])
+
+def assert_same_rows(a, b):
+    assert (a[0] == b[0]).all()
+    assert np.array_equal(a[1], b[1], equal_nan=True)
+
+def test_values_and_declarations():
+    assert arff_reader.split_values("a, 'b, c' ,\"d\\\"e\"") == ["a", "b, c", "d\"e"]
+    assert arff_reader.split_sparse("0 x, 3 'a, b'") == [(0, "x"), (3, "a, b")]
+    assert arff_reader.split_declaration("@attribute colour{red,blue}") == ("colour", "{red,blue}")
+    assert arff_reader.split_declaration("@attribute 'the size' numeric") == ("the size", "numeric")
+    with pytest.raises(SyntaxError):
+        arff_reader.split_values("a, 'b")
+
+def test_rows_do_not_depend_on_chunk_size(mixed):
+    whole = read_all(ArffReader(mixed, 1000))
+    assert whole[2] == [301]
+    reader = ArffReader(mixed)
+    assert reader.values[0] == ["red", "green", "blue", "dark grey", "?"]
+    # the last row is sparse, with the size left at 0
+    assert list(whole[0][-1]) == [3, 0, 0, 0, 2] and whole[1][-1][1:3].tolist() == [0.0, 3.5]
+    for chunkSize in (1, 7, 64):
+        chunks = read_all(ArffReader(mixed, chunkSize))
+        assert chunks[2] == [chunkSize] * (301 // chunkSize) + ([301 % chunkSize] if 301 % chunkSize else [])
+        assert_same_rows(chunks, whole)
+
+def test_shards_read_every_row_once(mixed):
+    whole = read_all(ArffReader(mixed, 64))
+    for count in (1, 2, 3, 7, 50):
+        reader = ArffReader(mixed, 64)
+        shards = reader.get_shards(count)
+        sizes = [reader.count_rows(start, end) for start, end in shards]
+        assert sum(sizes) == 301
+        firstRows = np.cumsum([0] + sizes[:-1])
+        parts = [list(reader.read_range(start, end, int(firstRow)))
+                 for (start, end), firstRow in zip(shards, firstRows)]
+        rows = read_all([chunk for part in parts for chunk in part])
+        assert_same_rows(rows, whole)
+        # chunks end where they would when reading the whole file
+        ends = np.cumsum(rows[2])
+        assert set(np.cumsum(whole[2])) <= set(ends)
+        assert all([end % 64 == 0 or end in firstRows[1:] or end == 301 for end in ends])
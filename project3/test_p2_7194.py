@@ -0,0 +1,209 @@
+import numpy as np
+import pytest
+
+import p2_7194 as nb
+
+# datasets
+
+def test_dataset_columns(weather):
+    dataset = nb.Dataset()
+    assert dataset.get_from_arff(weather)
+    assert len(dataset) == 14
+    assert dataset.classVals == {"yes", "no"}
+    outlook = dataset.get_column("outlook")
+    assert outlook.dtype == np.uint8 and not outlook.flags.writeable
+    assert [dataset.get_vocabulary("outlook")[k] for k in outlook[:3]] == ["sunny", "sunny", "overcast"]
+
+def test_dataset_rejects_numeric_class(tmp_path):
+    filename = tmp_path / "missing.arff"
+    filename.write_text("@relation missing\n@attribute yop real\n@attribute yap real\n@data\n1,5\n2,4\n?,?\n")
+    assert not nb.Dataset().get_from_arff(str(filename))
+
+def test_dataset_missing_file(tmp_path):
+    assert not nb.Dataset().get_from_arff(str(tmp_path / "none.arff"))
+
+# classification
+
+def get_classifier(filename):
+    dataset = nb.Dataset()
+    assert dataset.get_from_arff(filename)
+    classifier = nb.Classifier()
+    classifier.get_from_dataset(dataset)
+    return classifier
+
+def test_predict_batch_matches_classify_for_any_input(weather):
+    classifier = get_classifier(weather)
+    cases = [["sunny", "cool", "high", "TRUE"], ["overcast", "hot", "normal", "FALSE"],
+             ["?", "mild", "?", "FALSE"], ["snowy", "cold", "high", "TRUE"],
+             [b"rainy", b"mild", b"normal", b"TRUE"]]
+    expected = [classifier.classify(case) for case in cases]
+    assert expected[:2] == ["no", "yes"]
+    assert classifier.predict_batch(cases) == expected
+    assert classifier.predict_batch([tuple(case) for case in cases]) == expected
+    assert classifier.predict_batch(np.array(cases[:4])) == expected[:4]
+
+def test_predict_batch_rejects_short_cases(weather):
+    classifier = get_classifier(weather)
+    with pytest.raises(ValueError):
+        classifier.predict_batch([["sunny", "cool", "high", "TRUE"], ["sunny", "cool"]])
+
+# counting
+
+def assert_same_model(a, b):
+    (inverseA, priorA, gaussiansA) = a.get_probabilities()
+    (inverseB, priorB, gaussiansB) = b.get_probabilities()
+    # counts are exact, moments combined in a different order may differ in the last bits
+    assert inverseA == inverseB and priorA == priorB
+    assert gaussiansA.keys() == gaussiansB.keys()
+    for c in gaussiansA:
+        assert [g is None for g in gaussiansA[c]] == [g is None for g in gaussiansB[c]]
+        for ga, gb in zip(gaussiansA[c], gaussiansB[c]):
+            if ga is not None:
+                assert ga == pytest.approx(gb, rel=1e-9)
+
+def test_partial_fit_merge_and_subtract(mixed):
+    dataset = nb.Dataset()
+    assert dataset.get_from_arff(mixed)
+    whole = get_classifier(mixed)
+    first = dataset.get_subset(slice(0, 120))
+    second = dataset.get_subset(slice(120, None))
+
+    # cases added a few at a time give the model of all of them at once
+    online = nb.Classifier()
+    for start in range(0, len(dataset), 7):
+        online.partial_fit(dataset.get_subset(slice(start, start + 7)))
+    assert_same_model(online, whole)
+
+    models = []
+    for subset in (first, second):
+        models.append(nb.Classifier())
+        models[-1].partial_fit(subset)
+    merged = models[0].copy()
+    merged.merge(models[1])
+    assert_same_model(merged, whole)
+    assert len(models[0].classCounts) and int(models[0].classCounts.sum()) == 120
+
+    rest = whole.copy()
+    rest.subtract(models[0])
+    assert_same_model(rest, models[1])
+    # the copy is updated on its own
+    assert int(whole.classCounts.sum()) == 301
+    with pytest.raises(ValueError):
+        rest.subtract(whole)
+
+def test_subtract_rejects_cases_not_counted(weather, tmp_path):
+    # every case has the class of some case of the model, but overcast is never a case of no
+    filename = tmp_path / "other.arff"
+    filename.write_text(open(weather).read().split("@data")[0] + "@data\novercast,hot,high,FALSE,no\n")
+    other = get_classifier(str(filename))
+    model = get_classifier(weather)
+    with pytest.raises(ValueError):
+        model.subtract(other)
+
+# model files
+
+def test_binary_and_json_round_trip(mixed, tmp_path):
+    model = get_classifier(mixed)
+    cases = [["red", "1.5", "?", "round"], ["dark grey", "?", "21", "square"], ["?", "0", "12", "round"]]
+    expected = model.predict_batch(cases)
+    assert model.write_to_binary(str(tmp_path / "model.bin"))
+
+    binary = nb.Classifier()
+    assert binary.get_from_binary(str(tmp_path / "model.bin"))
+    assert binary.predict_batch(cases) == expected
+    assert binary.get_probabilities() == model.get_probabilities()
+
+    # written again as json from the mapped model, and back to binary from the json
+    assert binary.write_to_file(str(tmp_path / "model.json"))
+    text = nb.Classifier()
+    assert text.get_from_file(str(tmp_path / "model.json"))
+    assert text.predict_batch(cases) == expected
+    assert text.get_probabilities() == model.get_probabilities()
+    assert text.write_to_binary(str(tmp_path / "again.bin"))
+    assert open(str(tmp_path / "again.bin"), "rb").read() == open(str(tmp_path / "model.bin"), "rb").read()
+
+    # the mapped model keeps counting, like the one it was saved from
+    more = nb.Dataset()
+    assert more.get_from_arff(mixed)
+    binary.partial_fit(more)
+    model.partial_fit(more)
+    assert binary.predict_batch(cases) == model.predict_batch(cases)
+
+def test_binary_rejects_other_files(weather, tmp_path):
+    assert not nb.Classifier().get_from_binary(weather)
+    assert not nb.Classifier().get_from_binary(str(tmp_path / "none.bin"))
+    (tmp_path / "short.bin").write_bytes(b"NB")
+    assert not nb.Classifier().get_from_binary(str(tmp_path / "short.bin"))
+
+# parallel training
+
+def test_parallel_training_matches_serial(weather):
+    serial = nb.Classifier()
+    serial.get_from_stream(nb.ArffReader(weather))
+    for workers in (1, 3):
+        parallel = nb.Classifier()
+        parallel.get_from_arff_parallel(weather, workers)
+        assert parallel.get_probabilities() == serial.get_probabilities()
+        assert parallel.classify(["sunny", "cool", "high", "TRUE"]) == "no"
+
+def test_shard_moments_match_a_single_pass(mixed):
+    # small chunks, so chunks are split between shards
+    serial = nb.Classifier()
+    serial.get_from_stream(nb.ArffReader(mixed, 16))
+    for workers in (1, 2, 5):
+        parallel = nb.Classifier()
+        parallel.get_from_arff_parallel(mixed, workers, chunkSize=16)
+        order = [parallel.classVals.index(c) for c in serial.classVals]
+        for i in range(len(serial.moments)):
+            if serial.moments[i] is None:
+                assert parallel.moments[i] is None
+            else:
+                assert (parallel.moments[i][:, order] == serial.moments[i]).all()
+        assert parallel.get_probabilities() == serial.get_probabilities()
+
+# cross-validation
+
+def get_classifier_of(dataset):
+    classifier = nb.Classifier()
+    classifier.get_from_dataset(dataset)
+    return classifier
+
+def retrain_and_count(dataset, foldIds):
+    # the confusion counts of training a new model without each fold and classifying the fold
+    C = get_classifier_of(dataset).get_compiled().classes
+    counts = np.zeros((len(C), len(C)), dtype=np.int64)
+    cases = [[get_value(dataset, i, n) for i in range(len(dataset.attributeTypes))] for n in range(len(dataset))]
+    actual = [dataset.vocabularies[-1][k] for k in dataset.columns[-1]]
+    for fold in np.unique(foldIds):
+        model = get_classifier_of(dataset.get_subset(foldIds != fold))
+        for n in np.flatnonzero(foldIds == fold):
+            classified = model.predict_batch([cases[n]])[0]
+            if classified is not None:
+                counts[C.index(actual[n]), C.index(classified)] += 1
+    return counts
+
+def get_value(dataset, i, n):
+    if dataset.attributeTypes[i] != nb._numeric:
+        return dataset.vocabularies[i][dataset.columns[i][n]]
+    return "?" if np.isnan(dataset.columns[i][n]) else repr(float(dataset.columns[i][n]))
+
+def get_counts(matrix):
+    return np.array([[matrix.matrix[c1][c2] for c2 in matrix.matrix] for c1 in matrix.matrix])
+
+def test_leave_one_out_matches_retraining(weather, mixed):
+    for filename in (weather, mixed):
+        dataset = nb.Dataset()
+        assert dataset.get_from_arff(filename)
+        matrix = nb.cross_validate_dataset(dataset, None)
+        expected = retrain_and_count(dataset, np.arange(len(dataset)))
+        assert (get_counts(matrix) == expected).all()
+        assert matrix.unclassified == len(dataset) - expected.sum()
+
+def test_folds_match_retraining(mixed):
+    dataset = nb.Dataset()
+    assert dataset.get_from_arff(mixed)
+    foldIds = np.random.default_rng(3).permutation(len(dataset)) % 5
+    expected = retrain_and_count(dataset, foldIds)
+    for workers in (1, 2):
+        matrix = nb.cross_validate_dataset(dataset, 5, workers, seed=3)
+        assert (get_counts(matrix) == expected).all()
@@ -0,0 +1,63 @@
+import asyncio
+
+import p2_7194 as nb
+import service
+
+
+def get_service(filename):
+    dataset = nb.Dataset()
+    dataset.get_from_arff(filename)
+    classifier = nb.Classifier()
+    classifier.get_from_dataset(dataset)
+    classifier.get_compiled()
+    return service.ClassificationService(classifier, filename)
+
+# send each request in turn on one connection, returning the lines received after each
+# expecting the given number of response lines per request
+def talk(filename, requests):
+    async def run():
+        svc = get_service(filename)
+        server = await asyncio.start_server(svc.handle_connection, "127.0.0.1", 0, limit=service._maxLine)
+        port = server.sockets[0].getsockname()[1]
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        responses = []
+        for (data, lines) in requests:
+            writer.write(data)
+            await writer.drain()
+            responses.append([(await asyncio.wait_for(reader.readline(), 5)).decode().strip()
+                              for i in range(lines)])
+        writer.close()
+        server.close()
+        await server.wait_closed()
+        return responses
+    return asyncio.run(run())
+
+def test_case_and_errors(weather):
+    assert talk(weather, [(b"CASE sunny,cool,high,TRUE\n", 1),
+                           (b"CASE sunny,cool\n", 1),
+                           (b"FETCH\n", 1),
+                           (b"QUIT\n", 1)]) == \
+        [["CLASS no"], ["ERR expected 4 values"], ["ERR unknown command FETCH"], ["OK bye"]]
+
+def test_line_too_long_keeps_session(weather):
+    # one line longer than the stream limit, and one that fits the limit but not _maxLine
+    assert talk(weather, [(b"x" * (3 * service._maxLine) + b"\n", 1),
+                           (b"CASE overcast,hot,high,FALSE\n", 1),
+                           (b"y" * service._maxLine + b"\n", 1),
+                           (b"CASE overcast,hot,high,FALSE\n", 1)]) == \
+        [["ERR line too long"], ["CLASS yes"], ["ERR line too long"], ["CLASS yes"]]
+
+def test_bulk(weather):
+    assert talk(weather, [(b"BULK 2\nsunny,hot,high,FALSE\novercast,hot,high,FALSE\n", 2),
+                           (b"BULK 0\n", 1)]) == \
+        [["CLASS no", "CLASS yes"], ["ERR usage: BULK <count>, with count from 1 to " + str(service._maxBulk)]]
+
+def test_bulk_line_too_long_reads_every_case(weather):
+    responses = talk(weather, [(b"BULK 3\nsunny,hot,high,FALSE\n" + b"x" * (2 * service._maxLine) +
+                                 b"\nbad\n", 1),
+                                (b"STATS\n", 1)])
+    assert responses[0] == ["ERR case 2: line too long"]
+    assert responses[1][0].startswith("STATS ")
+    assert talk(weather, [(b"BULK 2\nsunny,hot,high,FALSE\nbad\n", 1),
+                           (b"CASE overcast,hot,high,FALSE\n", 1)]) == \
+        [["ERR case 2: expected 4 values"], ["CLASS yes"]]